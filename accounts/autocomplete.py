@@ -0,0 +1,120 @@
+import bisect
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+MAX_RESULTS = 20
+MAX_MEMO = 10000
+
+
+class UsernameIndex:
+    # Sorted array of lowercased usernames for prefix lookups by bisection.
+    # Each process keeps its own copy: saves and follows in this process
+    # apply immediately, the rest arrive with the periodic reload.
+
+    def __init__(self, refresh=None):
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._keys = []
+        self._users = []  # (username, pk), parallel to _keys
+        self._usernames = {}  # pk -> username
+        self._followers = {}  # pk -> followers_count
+        self._memo = {}
+        self._loaded_at = None
+
+    def _rows(self):
+        return (
+            get_user_model()
+            .objects.values_list("pk", "username", "profile__followers_count")
+            .order_by()
+        )
+
+    def load(self, rows=None):
+        rows = sorted(
+            (username.lower(), username, pk, followers or 0)
+            for pk, username, followers in (self._rows() if rows is None else rows)
+        )
+        with self._lock:
+            self._keys = [row[0] for row in rows]
+            self._users = [(row[1], row[2]) for row in rows]
+            self._usernames = {row[2]: row[1] for row in rows}
+            self._followers = {row[2]: row[3] for row in rows}
+            self._memo = {}
+            self._loaded_at = time.monotonic()
+
+    def _stale(self):
+        if self._loaded_at is None:
+            return True
+        refresh = self.refresh or settings.AUTOCOMPLETE_REFRESH
+        return time.monotonic() - self._loaded_at > refresh
+
+    def _position(self, pk):
+        username = self._usernames[pk]
+        key = username.lower()
+        i = bisect.bisect_left(self._keys, key)
+        while self._users[i][1] != pk:
+            i += 1
+        return i
+
+    def put(self, pk, username):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            if self._usernames.get(pk) == username:
+                return
+            if pk in self._usernames:
+                i = self._position(pk)
+                del self._keys[i], self._users[i]
+            key = username.lower()
+            i = bisect.bisect_right(self._keys, key)
+            self._keys.insert(i, key)
+            self._users.insert(i, (username, pk))
+            self._usernames[pk] = username
+            self._followers.setdefault(pk, 0)
+            self._memo = {}
+
+    def remove(self, pk):
+        with self._lock:
+            if pk not in self._usernames:
+                return
+            i = self._position(pk)
+            del self._keys[i], self._users[i]
+            del self._usernames[pk], self._followers[pk]
+            self._memo = {}
+
+    def bump(self, pk, delta):
+        with self._lock:
+            if pk in self._followers:
+                self._followers[pk] += delta
+                self._memo = {}
+
+    def search(self, prefix, limit=10):
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+        if self._stale():
+            self.load()
+        with self._lock:
+            results = self._memo.get(prefix)
+            if results is None:
+                start = bisect.bisect_left(self._keys, prefix)
+                end = bisect.bisect_left(self._keys, prefix + "\U0010ffff", start)
+                followers = self._followers
+                results = [
+                    (username, followers[pk])
+                    for username, pk in heapq.nlargest(
+                        MAX_RESULTS,
+                        self._users[start:end],
+                        key=lambda user: (followers[user[1]], -user[1]),
+                    )
+                ]
+                if len(self._memo) >= MAX_MEMO:
+                    self._memo = {}
+                self._memo[prefix] = results
+        return results[:limit]
+
+
+username_index = UsernameIndex()
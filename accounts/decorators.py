@@ -0,0 +1,38 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotAllowed
+
+
+def _resolve_user(request):
+    user = request.user
+    user.is_authenticated  # runs the lazy session lookup
+    return user
+
+
+async def aget_user(request):
+    # request.user loads the session and user from the database on first
+    # access, which the async request path has to do on a thread.
+    return await sync_to_async(_resolve_user)(request)
+
+
+def alogin_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def arequire_POST(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        return await view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from accounts.models import FriendShip, Profile
+
+
+class Command(BaseCommand):
+    help = "Fix Profile follower/following count drift against FriendShip."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_user = Profile.objects.aggregate(Max("user"))["user__max"] or 0
+        fixed = 0
+        for start in range(0, last_user + 1, batch_size):
+            fixed += self.reconcile(start, start + batch_size)
+        self.stdout.write(f"fixed {fixed} profiles")
+
+    def count(self, field, start, end):
+        return dict(
+            FriendShip.objects.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+            .values_list(field)
+            .annotate(Count("id"))
+            .order_by()
+        )
+
+    @transaction.atomic
+    def reconcile(self, start, end):
+        # lock the profiles first so a follow landing mid-batch waits for us
+        profiles = list(
+            Profile.objects.select_for_update()
+            .filter(user__gte=start, user__lt=end)
+            .only("pk", "user", "followers_count", "following_count")
+        )
+        followers = self.count("followed", start, end)
+        followings = self.count("following", start, end)
+        drifted = []
+        for profile in profiles:
+            counts = (
+                followers.get(profile.user_id, 0),
+                followings.get(profile.user_id, 0),
+            )
+            if (profile.followers_count, profile.following_count) != counts:
+                profile.followers_count, profile.following_count = counts
+                drifted.append(profile)
+        Profile.objects.bulk_update(drifted, ["followers_count", "following_count"])
+        return len(drifted)
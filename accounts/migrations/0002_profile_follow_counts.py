@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_follow_counts(apps, schema_editor):
+    Profile = apps.get_model("accounts", "Profile")
+    FriendShip = apps.get_model("accounts", "FriendShip")
+
+    def count_of(field):
+        return Coalesce(
+            Subquery(
+                FriendShip.objects.filter(**{field: OuterRef("user")})
+                .values(field)
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+
+    Profile.objects.update(
+        followers_count=count_of("followed"), following_count=count_of("following")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="followers_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="following_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_follow_counts, migrations.RunPython.noop),
+    ]
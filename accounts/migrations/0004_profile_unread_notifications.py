@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_friendship_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="unread_notifications",
+            field=models.IntegerField(default=0),
+        ),
+    ]
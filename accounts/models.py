@@ -1,8 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from .autocomplete import username_index
+
 
 class User(AbstractUser):
     email = models.EmailField(max_length=254)
@@ -21,14 +23,18 @@ class Profile(models.Model):
     self_intro = models.CharField(
         blank=True, null=True, max_length=252, verbose_name="self_intro"
     )
+    followers_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+    unread_notifications = models.IntegerField(default=0)
 
 
 class FriendShip(models.Model):
+    # indexed by follow_unique and follow_followed_following_idx
     following = models.ForeignKey(
-        User, related_name="following", on_delete=models.CASCADE
+        User, related_name="following", on_delete=models.CASCADE, db_index=False
     )
     followed = models.ForeignKey(
-        User, related_name="followed", on_delete=models.CASCADE
+        User, related_name="followed", on_delete=models.CASCADE, db_index=False
     )
 
     class Meta:
@@ -37,6 +43,11 @@ class FriendShip(models.Model):
                 fields=["following", "followed"], name="follow_unique"
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["followed", "following"], name="follow_followed_following_idx"
+            ),
+        ]
 
 
 @receiver(post_save, sender=User)
@@ -44,3 +55,13 @@ def post_user_created(sender, instance, created, **kwargs):
     if created:
         profile_obj = Profile(user=instance)
         profile_obj.save()
+
+
+@receiver(post_save, sender=User)
+def index_username(sender, instance, **kwargs):
+    username_index.put(instance.pk, instance.username)
+
+
+@receiver(post_delete, sender=User)
+def unindex_username(sender, instance, **kwargs):
+    username_index.remove(instance.pk)
@@ -0,0 +1,84 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, When
+
+from recommendations import tasks as recommendations
+from tasks.queue import cancel, enqueue
+from timelines import tasks as timelines
+
+from .autocomplete import username_index
+from .models import FriendShip, Profile
+
+
+def _bump_counts(following, followed, delta):
+    # one UPDATE for both profiles
+    Profile.objects.filter(user__in=[following, followed]).update(
+        following_count=Case(
+            When(user=following, then=F("following_count") + delta),
+            default=F("following_count"),
+        ),
+        followers_count=Case(
+            When(user=followed, then=F("followers_count") + delta),
+            default=F("followers_count"),
+        ),
+    )
+
+
+@transaction.atomic
+def follow(following, followed):
+    # Insert and let follow_unique reject an existing follow instead of
+    # checking exists() first.
+    try:
+        with transaction.atomic():
+            friendship = FriendShip.objects.create(
+                following=following, followed=followed
+            )
+    except IntegrityError:
+        return False
+    _bump_counts(following, followed, 1)
+    transaction.on_commit(lambda: username_index.bump(followed.pk, 1))
+    # the backfill and suggestion updates can lag the follow by a moment
+    enqueue(
+        timelines.backfill,
+        key=f"backfill:{friendship.pk}",
+        owner_id=following.pk,
+        author_id=followed.pk,
+    )
+    enqueue(
+        recommendations.on_follow,
+        key=f"on_follow:{friendship.pk}",
+        friendship_id=friendship.pk,
+        user_id=following.pk,
+        followed_id=followed.pk,
+    )
+    return True
+
+
+@transaction.atomic
+def unfollow(following, followed):
+    friendship_id = (
+        FriendShip.objects.filter(following=following, followed=followed)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if friendship_id is None:
+        return False
+    deleted, _ = FriendShip.objects.filter(pk=friendship_id).delete()
+    if deleted:
+        _bump_counts(following, followed, -deleted)
+        transaction.on_commit(lambda: username_index.bump(followed.pk, -deleted))
+        enqueue(
+            timelines.remove_author,
+            key=f"remove_author:{friendship_id}",
+            owner_id=following.pk,
+            author_id=followed.pk,
+        )
+        # a follow whose scores were never added has nothing to take back
+        if not cancel(f"on_follow:{friendship_id}"):
+            enqueue(
+                recommendations.on_unfollow,
+                key=f"on_unfollow:{friendship_id}",
+                friendship_id=friendship_id,
+                user_id=following.pk,
+                followed_id=followed.pk,
+            )
+    return bool(deleted)
@@ -4,9 +4,6 @@ register = template.Library()
 
 
 @register.filter(name="in_group")
-def in_group(user, group):
-    for person in group:
-        if person.followed == user:
-            return True
-            break
-    return False
+def in_group(user, user_ids):
+    # user_ids is a set built once per view, so each row is an O(1) lookup
+    return getattr(user, "pk", user) in user_ids
@@ -1,11 +1,21 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model, SESSION_KEY
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.messages import get_messages
 
 from mysite import settings
-from tweets.models import Tweet
+from tasks.worker import run_pending
+from tweets.models import Like, Tweet
+from timelines.models import TimelineEntry
+from timelines.services import fan_out
+from .autocomplete import username_index
 from .models import FriendShip, Profile
+from .services import follow
 
 User = get_user_model()
 
@@ -207,6 +217,83 @@ class TestHomeView(TestCase):
         self.assertQuerysetEqual(
             response.context["tweets"], Tweet.objects.order_by("-created_at")
         )
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_success_get_older_page(self):
+        for tweet in Tweet.objects.bulk_create(
+            Tweet(user=self.user, content=f"tweet{i}") for i in range(23)
+        ):
+            fan_out(tweet)
+        response = self.client.get(reverse("accounts:home"))
+        first_page = response.context["tweets"]
+        self.assertEqual(len(first_page), 20)
+        response = self.client.get(
+            reverse("accounts:home"), {"cursor": response.context["next_cursor"]}
+        )
+        second_page = response.context["tweets"]
+        self.assertEqual(len(second_page), 5)
+        self.assertIsNone(response.context["next_cursor"])
+        self.assertEqual(
+            [tweet.pk for tweet in first_page + second_page],
+            list(
+                Tweet.objects.order_by("-created_at", "-id").values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+    def test_success_get_older_page_with_same_created_at(self):
+        for tweet in Tweet.objects.bulk_create(
+            Tweet(user=self.user, content=f"tweet{i}") for i in range(23)
+        ):
+            fan_out(tweet)
+        created_at = Tweet.objects.first().created_at
+        Tweet.objects.update(created_at=created_at)
+        TimelineEntry.objects.update(created_at=created_at)
+        response = self.client.get(reverse("accounts:home"))
+        response2 = self.client.get(
+            reverse("accounts:home"), {"cursor": response.context["next_cursor"]}
+        )
+        pks = [tweet.pk for tweet in response.context["tweets"]]
+        pks += [tweet.pk for tweet in response2.context["tweets"]]
+        self.assertEqual(pks, sorted(Tweet.objects.values_list("pk", flat=True))[::-1])
+
+    def test_success_get_follow_and_like_state(self):
+        user2 = User.objects.create_user(
+            username="test2", email="test2@test.com", password="goodpass"
+        )
+        FriendShip.objects.create(following=self.user, followed=user2)
+        tweet = Tweet.objects.create(user=user2, content="followed")
+        Like.objects.create(tweet=tweet, user=self.user)
+        fan_out(tweet)
+        response = self.client.get(reverse("accounts:home"))
+        self.assertEqual(response.context["following_ids"], {user2.pk})
+        self.assertEqual(response.context["liked_ids"], {tweet.pk})
+        self.assertContains(
+            response, reverse("accounts:unfollow", kwargs={"username": "test2"})
+        )
+        self.assertContains(response, reverse("tweets:unlike", kwargs={"pk": tweet.pk}))
+
+    def test_success_get_query_count_independent_of_rows(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("accounts:home"))
+        for tweet in Tweet.objects.bulk_create(
+            Tweet(user=self.user, content=f"tweet{i}") for i in range(18)
+        ):
+            fan_out(tweet)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse("accounts:home"))
+        self.assertEqual(len(few), len(many))
+
+    def test_failure_get_with_invalid_cursor(self):
+        response = self.client.get(reverse("accounts:home"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_failure_get_with_out_of_range_cursor(self):
+        response = self.client.get(
+            reverse("accounts:home"), {"cursor": "99999999999999999999_1"}
+        )
+        self.assertEqual(response.status_code, 400)
 
 
 class TestLoginView(TestCase):
@@ -291,8 +378,8 @@ class TestUserProfileView(TestCase):
         post2 = {"content": "sorry"}
         self.client.post(reverse("tweets:create"), post)
         self.client.post(reverse("tweets:create"), post2)
-        FriendShip.objects.create(following=self.user, followed=self.user2)
-        FriendShip.objects.create(following=self.user2, followed=self.user)
+        follow(self.user, self.user2)
+        follow(self.user2, self.user)
 
     def test_success_get(self):
         response = self.client.get(
@@ -321,6 +408,29 @@ class TestUserProfileView(TestCase):
         response = self.client.get(reverse("accounts:user_profile", kwargs={"pk": 100}))
         self.assertEqual(response.status_code, 404)
 
+    def test_success_get_without_count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                reverse("accounts:user_profile", kwargs={"pk": self.user.pk})
+            )
+        self.assertFalse(
+            [q for q in queries if "COUNT(" in q["sql"] and "friendship" in q["sql"]]
+        )
+
+    def test_success_reconcile_follow_counts(self):
+        Profile.objects.update(followers_count=7, following_count=0)
+        out = StringIO()
+        call_command("reconcile_follow_counts", batch_size=1, stdout=out)
+        self.assertEqual(
+            list(
+                Profile.objects.order_by("user").values_list(
+                    "followers_count", "following_count"
+                )
+            ),
+            [(1, 1), (1, 1)],
+        )
+        self.assertIn("fixed 2 profiles", out.getvalue())
+
 
 class TestUserProfileEditView(TestCase):
     def setUp(self):
@@ -395,6 +505,15 @@ class TestFollowView(TestCase):
             fetch_redirect_response=True,
         )
         self.assertTrue(FriendShip.objects.filter(followed=self.user2).exists())
+        self.assertEqual(Profile.objects.get(user=self.user).following_count, 1)
+        self.assertEqual(Profile.objects.get(user=self.user2).followers_count, 1)
+
+    def test_success_post_backfills_timeline(self):
+        tweet = Tweet.objects.create(user=self.user2, content="hello")
+        self.client.post(reverse("accounts:follow", kwargs={"username": "test2"}))
+        run_pending()
+        response = self.client.get(reverse("accounts:home"))
+        self.assertEqual(list(response.context["tweets"]), [tweet])
 
     def test_failure_post_with_not_exist_user(self):
         response = self.client.post(
@@ -436,7 +555,7 @@ class TestUnfollowView(TestCase):
             username="test2", email="test2@test.com", password="goodpass"
         )
         self.client.login(username="test", password="goodpass")
-        FriendShip.objects.create(following=self.user, followed=self.user2)
+        follow(self.user, self.user2)
 
     def test_success_post(self):
         response = self.client.post(
@@ -451,6 +570,15 @@ class TestUnfollowView(TestCase):
             fetch_redirect_response=True,
         )
         self.assertFalse(FriendShip.objects.filter(followed=self.user2).exists())
+        self.assertEqual(Profile.objects.get(user=self.user).following_count, 0)
+        self.assertEqual(Profile.objects.get(user=self.user2).followers_count, 0)
+
+    def test_success_post_removes_timeline_entries(self):
+        tweet = Tweet.objects.create(user=self.user2, content="hello")
+        fan_out(tweet)
+        self.client.post(reverse("accounts:unfollow", kwargs={"username": "test2"}))
+        run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user).exists())
 
     def test_failure_post_with_not_exist_user(self):
         response = self.client.post(
@@ -483,6 +611,114 @@ class TestUnfollowView(TestCase):
         self.assertEqual(message, "無効な操作です。")
 
 
+class TestFollowApiView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.user2 = User.objects.create_user(
+            username="test2", email="test2@test.com", password="goodpass"
+        )
+        self.client.login(username="test", password="goodpass")
+
+    def test_success_toggle(self):
+        response = self.client.post(
+            reverse("accounts:follow_api", kwargs={"username": "test2"})
+        )
+        self.assertEqual(response.json(), {"username": "test2", "following": True})
+        self.assertTrue(FriendShip.objects.filter(followed=self.user2).exists())
+        response = self.client.post(
+            reverse("accounts:unfollow_api", kwargs={"username": "test2"})
+        )
+        self.assertEqual(response.json(), {"username": "test2", "following": False})
+        self.assertFalse(FriendShip.objects.filter(followed=self.user2).exists())
+        self.assertEqual(Profile.objects.get(user=self.user2).followers_count, 0)
+
+    def test_success_post_twice(self):
+        url = reverse("accounts:follow_api", kwargs={"username": "test2"})
+        self.client.post(url)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FriendShip.objects.filter(followed=self.user2).count(), 1)
+        self.assertEqual(Profile.objects.get(user=self.user2).followers_count, 1)
+
+    def test_success_post_resolves_target_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse("accounts:follow_api", kwargs={"username": "test2"})
+            )
+        user_selects = [
+            q
+            for q in queries
+            if q["sql"].startswith("SELECT") and 'FROM "accounts_user"' in q["sql"]
+        ]
+        # one for the session user, one for the target
+        self.assertEqual(len(user_selects), 2)
+        self.assertFalse([q for q in queries if "EXISTS" in q["sql"]])
+
+    def test_failure_post_with_self(self):
+        response = self.client.post(
+            reverse("accounts:follow_api", kwargs={"username": "test"})
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(FriendShip.objects.exists())
+
+    def test_failure_post_with_not_exist_user(self):
+        response = self.client.post(
+            reverse("accounts:follow_api", kwargs={"username": "third"})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "存在しないユーザーです。"})
+        self.assertEqual(list(get_messages(response.wsgi_request)), [])
+
+    def test_failure_get(self):
+        response = self.client.get(
+            reverse("accounts:follow_api", kwargs={"username": "test2"})
+        )
+        self.assertEqual(response.status_code, 405)
+
+
+class TestAutocompleteView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        for name in ["alice", "Alfred", "albert", "bob"]:
+            User.objects.create_user(username=name, password="goodpass")
+        for name in ["albert", "bob"]:
+            follow(self.user, User.objects.get(username=name))
+        username_index.load()
+        self.client.login(username="test", password="goodpass")
+
+    def get(self, q, **params):
+        response = self.client.get(reverse("accounts:autocomplete"), {"q": q, **params})
+        return [row["username"] for row in response.json()["results"]]
+
+    def test_success_get_ranked_by_followers(self):
+        self.assertEqual(self.get("al"), ["albert", "alice", "Alfred"])
+        self.assertEqual(self.get("AL", limit=1), ["albert"])
+        self.assertEqual(self.get("al", limit=-3), ["albert"])
+        self.assertEqual(self.get("al", limit=0), ["albert"])
+        self.assertEqual(self.get("x"), [])
+        self.assertEqual(self.get(""), [])
+
+    def test_success_lookup_without_queries(self):
+        with self.assertNumQueries(0):
+            username_index.search("al")
+
+    def test_success_index_follows_changes(self):
+        User.objects.create_user(username="alan", password="goodpass")
+        User.objects.get(username="albert").delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            follow(self.user, User.objects.get(username="Alfred"))
+        self.assertEqual(self.get("al"), ["Alfred", "alice", "alan"])
+
+    def test_failure_get_without_login(self):
+        self.client.logout()
+        response = self.client.get(reverse("accounts:autocomplete"), {"q": "al"})
+        self.assertEqual(response.status_code, 302)
+
+
 class TestFollowingListView(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -28,4 +28,7 @@ urlpatterns = [
     ),
     path("<str:username>/follow/", views.FollowView.as_view(), name="follow"),
     path("<str:username>/unfollow/", views.UnFollowView.as_view(), name="unfollow"),
+    path("api/autocomplete/", views.autocomplete_view, name="autocomplete"),
+    path("api/<str:username>/follow/", views.follow_api_view, name="follow_api"),
+    path("api/<str:username>/unfollow/", views.unfollow_api_view, name="unfollow_api"),
 ]
@@ -1,4 +1,6 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, login, get_user_model
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import reverse_lazy, reverse
@@ -7,20 +9,51 @@ from django.views.generic import (
     TemplateView,
     UpdateView,
     DetailView,
-    ListView,
+    View,
 )
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.contrib import messages
 from django.shortcuts import render
+from django.views.decorators.http import require_POST
 
+from . import services
+from .autocomplete import MAX_RESULTS, username_index
+from .decorators import aget_user
 from .forms import SigninForm, SignUpForm, ProfileEditForm
 from .models import Profile, FriendShip
+from tweets.fragments import attach_rows
 from tweets.models import Tweet, Like
+from tweets.pagination import paginate
+from recommendations import services as recommendations
+from timelines import services as timelines
 
 
 User = get_user_model()
 
 
+def get_following_ids(user):
+    return set(
+        FriendShip.objects.filter(following=user).values_list("followed_id", flat=True)
+    )
+
+
+def get_liked_ids(user, tweets):
+    return set(
+        Like.objects.filter(user=user, tweet__in=tweets).values_list(
+            "tweet_id", flat=True
+        )
+    )
+
+
+async def aget_liked_ids(user, tweets):
+    return {
+        pk
+        async for pk in Like.objects.filter(
+            user_id=user.pk, tweet__in=[tweet.pk for tweet in tweets]
+        ).values_list("tweet_id", flat=True)
+    }
+
+
 class SignUpView(CreateView):
     template_name = "accounts/signup.html"
     form_class = SignUpForm
@@ -40,25 +73,33 @@ class WelcomeView(TemplateView):
     template_name = "welcome/index.html"
 
 
-class HomeView(ListView):
+class HomeView(View):
     template_name = "accounts/home.html"
-    context_object_name = "tweets"
-    model = Tweet
-    queryset = (
-        Tweet.objects.select_related("user")
-        .prefetch_related("like_set")
-        .order_by("-created_at")
-    )
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        ctx["followings"] = FriendShip.objects.select_related(
-            "following", "followed"
-        ).filter(following=self.request.user)
-        ctx["liked_list"] = Like.objects.filter(user=self.request.user).values_list(
-            "tweet", flat=True
+    async def get(self, request, *args, **kwargs):
+        user = await aget_user(request)
+        tweets, next_cursor = await timelines.ahome_timeline(
+            user, request.GET.get("cursor")
         )
-        return ctx
+        following_ids, suggestions = await recommendations.afollowing_and_suggestions(
+            user.pk
+        )
+        ctx = {
+            "tweets": tweets,
+            "next_cursor": next_cursor,
+            "following_ids": following_ids,
+            "suggestions": suggestions,
+            "liked_ids": await aget_liked_ids(user, tweets),
+            "unread_notifications": await Profile.objects.filter(user_id=user.pk)
+            .values_list("unread_notifications", flat=True)
+            .afirst(),
+        }
+        # the fragment cache and the template (messages, session) are sync
+        return await sync_to_async(self.render)(ctx)
+
+    def render(self, ctx):
+        ctx["tweets"] = attach_rows(ctx["tweets"])
+        return render(self.request, self.template_name, ctx)
 
 
 class SigninView(LoginView):
@@ -77,26 +118,15 @@ class UserProfileView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        tweets = (
-            Tweet.objects.select_related("user")
-            .filter(user=self.request.user)
-            .prefetch_related("like_set")
-            .order_by("-created_at")
-        )
-        ctx["tweets"] = tweets
-        ctx["followings_num"] = (
-            FriendShip.objects.select_related("following", "followed")
-            .filter(following=self.request.user)
-            .count()
-        )
-        ctx["followers_num"] = (
-            FriendShip.objects.select_related("following", "followed")
-            .filter(followed=self.request.user)
-            .count()
-        )
-        ctx["liked_list"] = Like.objects.filter(user=self.request.user).values_list(
-            "tweet", flat=True
+        tweets, next_cursor = paginate(
+            Tweet.objects.select_related("user").filter(user=self.request.user),
+            self.request.GET.get("cursor"),
         )
+        ctx["tweets"] = attach_rows(tweets)
+        ctx["next_cursor"] = next_cursor
+        ctx["followings_num"] = self.object.following_count
+        ctx["followers_num"] = self.object.followers_count
+        ctx["liked_ids"] = get_liked_ids(self.request.user, tweets)
         return ctx
 
 
@@ -113,53 +143,101 @@ class UserProfileEditView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return self.request.user == profile.user
 
 
+def find_user(username):
+    return User.objects.only("pk", "username").filter(username=username).first()
+
+
+def get_target_user(request, username):
+    user = find_user(username)
+    if user is None:
+        messages.error(request, "存在しないユーザーです。")
+        raise Http404
+    return user
+
+
 class FollowView(LoginRequiredMixin, TemplateView):
     template_name = "accounts/follow.html"
     model = FriendShip
 
     def post(self, request, *args, **kwargs):
-        try:
-            following = User.objects.get(username=request.user.username)
-            followed = User.objects.get(username=self.kwargs["username"])
-            if following == followed:
-                messages.warning(request, "自分自身はフォローできません。")
-                return render(request, "accounts/follow.html")
-            elif FriendShip.objects.filter(
-                following=following, followed=followed
-            ).exists():
-                messages.warning(request, "すでにフォローしています。")
-                return render(request, "accounts/follow.html")
-            else:
-                FriendShip.objects.create(following=following, followed=followed)
-                return HttpResponseRedirect(reverse_lazy("accounts:home"))
-        except User.DoesNotExist:
-            messages.error(request, "存在しないユーザーです。")
-            raise Http404
+        followed = get_target_user(request, self.kwargs["username"])
+        if followed.pk == request.user.pk:
+            messages.warning(request, "自分自身はフォローできません。")
+            return render(request, "accounts/follow.html")
+        elif not services.follow(request.user, followed):
+            messages.warning(request, "すでにフォローしています。")
+            return render(request, "accounts/follow.html")
+        else:
+            return HttpResponseRedirect(reverse_lazy("accounts:home"))
 
 
 class UnFollowView(LoginRequiredMixin, TemplateView):
     template_name = "accounts/unfollow.html"
 
     def post(self, request, *args, **kwargs):
-        try:
-            following = User.objects.get(username=request.user.username)
-            followed = User.objects.get(username=self.kwargs["username"])
-            if following == followed:
-                messages.warning(request, "自分自身はフォロー解除できません。")
-                return render(request, "accounts/unfollow.html")
-            elif FriendShip.objects.filter(
-                following=following, followed=followed
-            ).exists():
-                FriendShip.objects.filter(
-                    following=following, followed=followed
-                ).delete()
-                return HttpResponseRedirect(reverse_lazy("accounts:home"))
-            else:
-                messages.warning(request, "無効な操作です。")
-                return render(request, "accounts/unfollow.html")
-        except User.DoesNotExist:
-            messages.error(request, "存在しないユーザーです。")
-            raise Http404
+        followed = get_target_user(request, self.kwargs["username"])
+        if followed.pk == request.user.pk:
+            messages.warning(request, "自分自身はフォロー解除できません。")
+            return render(request, "accounts/unfollow.html")
+        elif not services.unfollow(request.user, followed):
+            messages.warning(request, "無効な操作です。")
+            return render(request, "accounts/unfollow.html")
+        else:
+            return HttpResponseRedirect(reverse_lazy("accounts:home"))
+
+
+@login_required
+@require_POST
+def follow_api_view(request, username):
+    followed = find_user(username)
+    if followed is None:
+        return JsonResponse({"error": "存在しないユーザーです。"}, status=404)
+    if followed.pk == request.user.pk:
+        return JsonResponse({"error": "自分自身はフォローできません。"}, status=400)
+    services.follow(request.user, followed)
+
+    context = {
+        "username": followed.username,
+        "following": True,
+    }
+
+    return JsonResponse(context)
+
+
+@login_required
+@require_POST
+def unfollow_api_view(request, username):
+    followed = find_user(username)
+    if followed is None:
+        return JsonResponse({"error": "存在しないユーザーです。"}, status=404)
+    if followed.pk == request.user.pk:
+        return JsonResponse({"error": "自分自身はフォロー解除できません。"}, status=400)
+    services.unfollow(request.user, followed)
+
+    context = {
+        "username": followed.username,
+        "following": False,
+    }
+
+    return JsonResponse(context)
+
+
+@login_required
+def autocomplete_view(request):
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 10)), MAX_RESULTS))
+    except ValueError:
+        limit = 10
+    results = username_index.search(request.GET.get("q", "").strip(), limit)
+
+    context = {
+        "results": [
+            {"username": username, "followers": followers}
+            for username, followers in results
+        ],
+    }
+
+    return JsonResponse(context)
 
 
 class FollowingListView(LoginRequiredMixin, TemplateView):
@@ -167,9 +245,9 @@ class FollowingListView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["followings"] = FriendShip.objects.select_related(
-            "following", "followed"
-        ).filter(following=self.request.user)
+        ctx["followings"] = FriendShip.objects.select_related("followed").filter(
+            following=self.request.user
+        )
         return ctx
 
 
@@ -178,10 +256,8 @@ class FollowerListView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["followings"] = FriendShip.objects.select_related(
-            "following", "followed"
-        ).filter(following=self.request.user)
-        ctx["followers"] = FriendShip.objects.select_related(
-            "following", "followed"
-        ).filter(followed=self.request.user)
+        ctx["following_ids"] = get_following_ids(self.request.user)
+        ctx["followers"] = FriendShip.objects.select_related("following").filter(
+            followed=self.request.user
+        )
         return ctx
@@ -0,0 +1,142 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import FriendShip
+from timelines.models import HighFanoutAuthor
+from timelines.services import fan_out
+from tweets.models import Tweet
+
+from . import views
+
+User = get_user_model()
+
+
+def lines(response):
+    content = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="goodpass")
+        self.author = User.objects.create_user(username="author", password="goodpass")
+        self.client.force_login(self.user)
+
+
+class TestTimelineApi(ApiTestCase):
+    def test_pages_home_timeline(self):
+        celebrity = User.objects.create_user(username="celebrity", password="goodpass")
+        HighFanoutAuthor.objects.create(user=celebrity)
+        FriendShip.objects.create(following=self.user, followed=self.author)
+        FriendShip.objects.create(following=self.user, followed=celebrity)
+        for i in range(25):
+            # the celebrity's tweet is read from its author stream, not fanned out
+            if i == 2:
+                Tweet.objects.create(user=celebrity, content=f"tweet {i}")
+            else:
+                fan_out(Tweet.objects.create(user=self.author, content=f"tweet {i}"))
+        response = self.client.get(reverse("api:timeline"))
+        page = response.json()
+        self.assertEqual(len(page["results"]), 20)
+        first = page["results"][0]
+        self.assertEqual(
+            set(first), {"id", "created_at", "username", "content", "like_count"}
+        )
+        self.assertEqual(
+            (first["username"], first["content"], first["like_count"]),
+            ("author", "tweet 24", 0),
+        )
+
+        response = self.client.get(
+            reverse("api:timeline"), {"cursor": page["next_cursor"]}
+        )
+        rest = response.json()
+        self.assertEqual(
+            [row["content"] for row in rest["results"]],
+            [f"tweet {i}" for i in range(4, -1, -1)],
+        )
+        self.assertEqual(rest["results"][2]["username"], "celebrity")
+        self.assertIsNone(rest["next_cursor"])
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(reverse("api:timeline"))
+        self.assertEqual(response.status_code, 302)
+
+
+class TestUserTweetsApi(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(25):
+            Tweet.objects.create(user=self.author, content=f"tweet {i}")
+        self.url = reverse("api:user_tweets", kwargs={"username": "author"})
+
+    def test_json_page(self):
+        page = self.client.get(self.url).json()
+        self.assertEqual(len(page["results"]), 20)
+        self.assertEqual(page["results"][0]["content"], "tweet 24")
+        rest = self.client.get(self.url, {"cursor": page["next_cursor"]}).json()
+        self.assertEqual(len(rest["results"]), 5)
+        self.assertIsNone(rest["next_cursor"])
+
+    def test_ndjson_stream(self):
+        response = self.client.get(self.url, {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = lines(response)
+        self.assertEqual(
+            [row["content"] for row in rows], [f"tweet {i}" for i in range(24, -1, -1)]
+        )
+
+    def test_unknown_user(self):
+        url = reverse("api:user_tweets", kwargs={"username": "nobody"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class TestFollowExportApi(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fans = [
+            User.objects.create_user(username=f"fan{i}", password="goodpass")
+            for i in range(5)
+        ]
+        for fan in self.fans:
+            FriendShip.objects.create(following=fan, followed=self.author)
+        FriendShip.objects.create(following=self.author, followed=self.user)
+
+    def test_followers_stream_in_chunks(self):
+        views.CHUNK_SIZE, chunk_size = 2, views.CHUNK_SIZE
+        self.addCleanup(setattr, views, "CHUNK_SIZE", chunk_size)
+        response = self.client.get(
+            reverse("api:followers", kwargs={"username": "author"})
+        )
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        self.assertEqual(
+            rows, [{"id": fan.pk, "username": fan.username} for fan in self.fans]
+        )
+
+    def test_followings(self):
+        response = self.client.get(
+            reverse("api:followings", kwargs={"username": "author"})
+        )
+        self.assertEqual(lines(response), [{"id": self.user.pk, "username": "reader"}])
+
+    async def test_streams_async_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(
+            reverse("api:followers", kwargs={"username": "author"})
+        )
+        self.assertTrue(response.is_async)
+        rows = [
+            json.loads(line)
+            for chunk in [chunk async for chunk in response.streaming_content]
+            for line in chunk.decode().splitlines()
+        ]
+        self.assertEqual(
+            [row["username"] for row in rows], [f"fan{i}" for i in range(5)]
+        )
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = "api"
+urlpatterns = [
+    path("timeline/", views.home_timeline_view, name="timeline"),
+    path("users/<str:username>/tweets/", views.user_tweets_view, name="user_tweets"),
+    path("users/<str:username>/followers/", views.followers_view, name="followers"),
+    path("users/<str:username>/followings/", views.followings_view, name="followings"),
+]
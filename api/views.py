@@ -0,0 +1,109 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+
+from accounts.models import FriendShip
+from timelines.services import ROW_FIELDS, home_timeline_rows
+from tweets.models import Tweet
+from tweets.pagination import PAGE_SIZE, encode_cursor, seek
+
+User = get_user_model()
+
+CHUNK_SIZE = 2000
+TWEET_COLUMNS = ("id", "created_at", "user__username", "content", "like_count")
+USER_FIELDS = ("id", "username")
+
+
+def _rows(fields, rows):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def _page(fields, rows, next_cursor):
+    return JsonResponse({"results": _rows(fields, rows), "next_cursor": next_cursor})
+
+
+def _lines(fields, rows):
+    return "".join(
+        json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+        for row in _rows(fields, rows)
+    )
+
+
+def _stream(fields, queryset):
+    # Rows are serialized straight from the cursor one chunk at a time, so
+    # memory stays flat however many rows the export has.
+    rows = []
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        rows.append(row)
+        if len(rows) == CHUNK_SIZE:
+            yield _lines(fields, rows)
+            rows = []
+    if rows:
+        yield _lines(fields, rows)
+
+
+async def _astream(fields, queryset):
+    # each chunk is pulled in the thread that owns the connection; aiterator()
+    # can't be used as it runs values_list() queries in the event loop
+    chunks = _stream(fields, queryset)
+    while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+        yield chunk
+
+
+def ndjson_response(request, fields, queryset):
+    # Django buffers a sync iterator whole under ASGI and an async one whole
+    # under WSGI, so hand each server the kind it can stream.
+    stream = _astream if isinstance(request, ASGIRequest) else _stream
+    return StreamingHttpResponse(
+        stream(fields, queryset), content_type="application/x-ndjson"
+    )
+
+
+@login_required
+def home_timeline_view(request):
+    rows, next_cursor = home_timeline_rows(request.user, request.GET.get("cursor"))
+    return _page(ROW_FIELDS, rows, next_cursor)
+
+
+@login_required
+def user_tweets_view(request, username):
+    user = get_object_or_404(User, username=username)
+    tweets = seek(Tweet.objects.filter(user=user), request.GET.get("cursor"))
+    if request.GET.get("format") == "ndjson":
+        return ndjson_response(request, ROW_FIELDS, tweets.values_list(*TWEET_COLUMNS))
+    rows = list(tweets.values_list(*TWEET_COLUMNS)[: PAGE_SIZE + 1])
+    next_cursor = None
+    if len(rows) > PAGE_SIZE:
+        rows = rows[:PAGE_SIZE]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return _page(ROW_FIELDS, rows, next_cursor)
+
+
+@login_required
+def followers_view(request, username):
+    user = get_object_or_404(User, username=username)
+    return ndjson_response(
+        request,
+        USER_FIELDS,
+        FriendShip.objects.filter(followed=user)
+        .order_by("following_id")
+        .values_list("following_id", "following__username"),
+    )
+
+
+@login_required
+def followings_view(request, username):
+    user = get_object_or_404(User, username=username)
+    return ndjson_response(
+        request,
+        USER_FIELDS,
+        FriendShip.objects.filter(following=user)
+        .order_by("followed_id")
+        .values_list("followed_id", "followed__username"),
+    )
@@ -0,0 +1,128 @@
+import asyncio
+import statistics
+import time
+from collections import defaultdict, namedtuple
+
+Request = namedtuple("Request", "method path headers body expect", defaults=(b"", None))
+
+
+class HttpConnection:
+    # Minimal HTTP/1.1 keep-alive client; reconnects when the server closes.
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, headers=(), body=b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+            *(f"{name}: {value}" for name, value in headers),
+        ]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        length, chunked, close = None, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value
+            elif name == "connection":
+                close = value == "close"
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif length is not None:
+            await self.reader.readexactly(length)
+        else:
+            await self.reader.read()
+            close = True
+        if close:
+            await self.close()
+        return status
+
+
+def summarize(timings, errors, elapsed):
+    timings = sorted(timings)
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "rps": len(timings) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(timings) if timings else 0.0,
+        "p99_ms": (
+            timings[min(len(timings) - 1, int(len(timings) * 0.99))] if timings else 0.0
+        ),
+    }
+
+
+async def run_load(host, port, make_request, concurrency, duration):
+    # make_request(client, iteration) -> (method, path, headers), optionally
+    # followed by body and expect as in Request. Without expect, statuses of
+    # 300 and up count as errors: a redirect here means a lost session.
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    deadline = time.perf_counter() + duration
+
+    async def client(number):
+        connection = HttpConnection(host, port)
+        iteration = 0
+        while time.perf_counter() < deadline:
+            request = Request(*make_request(number, iteration))
+            iteration += 1
+            start = time.perf_counter()
+            try:
+                status = await connection.request(
+                    request.method, request.path, request.headers, request.body
+                )
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                errors[request.method] += 1
+                await connection.close()
+                continue
+            if request.expect:
+                failed = status != request.expect
+            else:
+                failed = status >= 300
+            if failed:
+                errors[request.method] += 1
+            else:
+                timings[request.method].append((time.perf_counter() - start) * 1000)
+        await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize(
+        [ms for samples in timings.values() for ms in samples],
+        sum(errors.values()),
+        elapsed,
+    )
+    result["methods"] = {
+        method: summarize(timings[method], errors[method], elapsed)
+        for method in sorted({*timings, *errors})
+    }
+    return result
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from benchmarks.loadtest import run_load
+from benchmarks.seed import seed_graph, session_key
+from tweets.models import Tweet
+
+HOST = "127.0.0.1"
+
+SERVERS = {
+    "wsgi": ["gunicorn", "--workers", "{workers}", "--bind", "{host}:{port}"]
+    + ["--log-level", "warning", "mysite.wsgi:application"],
+    "asgi": ["uvicorn", "--workers", "{workers}", "--host", "{host}"]
+    + ["--port", "{port}", "--log-level", "warning", "mysite.asgi:application"],
+}
+
+SETTINGS_MODULE = """\
+from mysite.settings import *  # noqa: F401,F403
+
+DATABASES["default"]["NAME"] = {database!r}
+DEBUG = False
+ALLOWED_HOSTS = [{host!r}]
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a file-backed throwaway database, then serve it with gunicorn "
+        "(WSGI) and uvicorn (ASGI) at the same worker count and report "
+        "requests/sec and latency for the home timeline and like/unlike."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", nargs="+", default=list(SERVERS))
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tweets", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        unknown = set(options["servers"]) - set(SERVERS)
+        if unknown:
+            raise CommandError(f"unknown servers: {', '.join(sorted(unknown))}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = os.path.join(tmp, "bench.sqlite3")
+            connection.settings_dict["TEST"]["NAME"] = database
+            old_name = connection.creation.create_test_db(verbosity=0)
+            try:
+                scenarios = self.prepare(options)
+                connection.close()
+                Path(tmp, "bench_settings.py").write_text(
+                    SETTINGS_MODULE.format(database=database, host=HOST)
+                )
+                results = []
+                for server in options["servers"]:
+                    with self.serve(server, tmp, options["workers"]) as port:
+                        for name, make_request in scenarios.items():
+                            # first pass warms up workers and caches
+                            self.load(port, make_request, options, duration=1)
+                            results.append(
+                                (name, server, self.load(port, make_request, options))
+                            )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'scenario':<10}{'server':<7}{'req/s':>9}{'p50 ms':>9}"
+            f"{'p99 ms':>9}{'errors':>8}"
+        )
+        for name, server, result in results:
+            self.stdout.write(
+                f"{name:<10}{server:<7}{result['rps']:>9.1f}{result['p50_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['errors']:>8}"
+            )
+
+    def prepare(self, options):
+        users = seed_graph(
+            users=options["users"], tweets=options["tweets"], seed=options["seed"]
+        )
+        token = get_random_string(32)
+        headers = [
+            [
+                ("Cookie", f"sessionid={session_key(user)}; csrftoken={token}"),
+                ("X-CSRFToken", token),
+            ]
+            for user in users[: options["concurrency"]]
+        ]
+        tweet_ids = list(
+            Tweet.objects.order_by("-created_at").values_list("pk", flat=True)[
+                : options["concurrency"] * 10
+            ]
+        )
+        home = reverse("accounts:home")
+
+        def home_request(client, iteration):
+            return "GET", home, headers[client % len(headers)]
+
+        def like_request(client, iteration):
+            # each client likes then unlikes a tweet, so every request writes
+            pk = tweet_ids[(client * 10 + iteration // 2) % len(tweet_ids)]
+            view = "tweets:unlike" if iteration % 2 else "tweets:like"
+            return (
+                "POST",
+                reverse(view, kwargs={"pk": pk}),
+                headers[client % len(headers)],
+            )
+
+        return {"home": home_request, "like": like_request}
+
+    def load(self, port, make_request, options, duration=None):
+        return asyncio.run(
+            run_load(
+                HOST,
+                port,
+                make_request,
+                options["concurrency"],
+                duration or options["duration"],
+            )
+        )
+
+    @contextmanager
+    def serve(self, server, settings_dir, workers):
+        port = free_port()
+        argv = [
+            arg.format(workers=workers, host=HOST, port=port) for arg in SERVERS[server]
+        ]
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="bench_settings",
+            PYTHONPATH=os.pathsep.join([settings_dir, str(settings.BASE_DIR)]),
+        )
+        process = subprocess.Popen(
+            [sys.executable, "-m", *argv], cwd=settings.BASE_DIR, env=env
+        )
+        try:
+            self.wait_until_ready(process, port)
+            yield port
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def wait_until_ready(self, process, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"server exited with status {process.returncode}")
+            try:
+                socket.create_connection((HOST, port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"server did not listen on port {port}")
@@ -0,0 +1,191 @@
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+
+from accounts import services
+from benchmarks.seed import seed_graph
+from tasks.queue import enqueue
+from timelines import services as timelines
+from timelines import tasks as timeline_tasks
+from tweets.models import Like, Tweet
+from tweets.views import _like, _unlike
+
+# What a connection gets without the hook: rollback journal, full fsync,
+# the default page cache and the 5s timeout of Python's sqlite3 module.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "mmap_size": 0,
+    "cache_size": -2000,
+    "busy_timeout": 5000,
+}
+
+
+def modes():
+    return {
+        "default": (DEFAULT_PRAGMAS, False),
+        "wal": (settings.SQLITE_PRAGMAS, False),
+        "immediate": (settings.SQLITE_PRAGMAS, True),
+    }
+
+
+def like(rng, users, tweet_ids):
+    # the transactions like_view and unlike_view run
+    user, pk = rng.choice(users), rng.choice(tweet_ids)
+    if Like.objects.filter(tweet_id=pk, user=user).exists():
+        _unlike(pk, user)
+    else:
+        _like(pk, user)
+
+
+def follow(rng, users, tweet_ids):
+    following, followed = rng.sample(users, 2)
+    if not services.follow(following, followed):
+        services.unfollow(following, followed)
+
+
+def tweet(rng, users, tweet_ids):
+    # what TweetCreateView.form_valid does; followers' timelines are left to
+    # the queued fan-out task
+    with transaction.atomic():
+        created = Tweet.objects.create(user=rng.choice(users), content="benchmark")
+        timelines.fan_out_to_author(created)
+        enqueue(
+            timeline_tasks.fan_out, key=f"fan_out:{created.pk}", tweet_id=created.pk
+        )
+
+
+WRITES = {"like": like, "follow": follow, "tweet": tweet}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a file-backed throwaway SQLite database and hammer it with "
+        "concurrent like/follow/tweet writers (plus home timeline readers) "
+        "under the default pragmas, WAL, and WAL with BEGIN IMMEDIATE. Reports "
+        "throughput, write latency and 'database is locked' errors per mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", nargs="+", default=list(modes()))
+        parser.add_argument("--writes", nargs="+", default=list(WRITES))
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=2)
+        parser.add_argument("--duration", type=float, default=5)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--tweets", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("this benchmark needs the sqlite3 backend")
+        unknown = set(options["modes"]) - set(modes())
+        unknown |= set(options["writes"]) - set(WRITES)
+        if unknown:
+            raise CommandError(f"unknown choices: {', '.join(sorted(unknown))}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # threads need a file; the in-memory test database is per thread
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                tmp, "bench.sqlite3"
+            )
+            old_name = connection.creation.create_test_db(verbosity=0)
+            try:
+                users = seed_graph(
+                    users=options["users"],
+                    tweets=options["tweets"],
+                    seed=options["seed"],
+                )
+                tweet_ids = list(Tweet.objects.values_list("pk", flat=True))
+                results = []
+                for mode in options["modes"]:
+                    pragmas, immediate = modes()[mode]
+                    with override_settings(
+                        SQLITE_PRAGMAS=pragmas, SQLITE_BEGIN_IMMEDIATE=immediate
+                    ):
+                        connections.close_all()
+                        results.append((mode, self.run(users, tweet_ids, options)))
+                connections.close_all()
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'mode':<11}{'writes/s':>9}{'reads/s':>9}{'p50 ms':>9}"
+            f"{'p99 ms':>9}{'locked':>8}"
+        )
+        for mode, result in results:
+            self.stdout.write(
+                f"{mode:<11}{result['writes_per_s']:>9.1f}"
+                f"{result['reads_per_s']:>9.1f}{result['p50_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['locked']:>8}"
+            )
+
+    def run(self, users, tweet_ids, options):
+        writes = [WRITES[name] for name in options["writes"]]
+        deadline = time.monotonic() + options["duration"]
+        latencies, reads, locked = [], [0], [0]
+        lock = threading.Lock()
+
+        def writer(worker):
+            rng = random.Random(options["seed"] * 1000 + worker)
+            timings, errors = [], 0
+            try:
+                while time.monotonic() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        rng.choice(writes)(rng, users, tweet_ids)
+                    except OperationalError:
+                        errors += 1
+                    else:
+                        timings.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(timings)
+                locked[0] += errors
+
+        def reader(worker):
+            rng = random.Random(-worker - 1)
+            count = 0
+            try:
+                while time.monotonic() < deadline:
+                    try:
+                        timelines.home_timeline(rng.choice(users))
+                        count += 1
+                    except OperationalError:
+                        pass
+            finally:
+                connection.close()
+            with lock:
+                reads[0] += count
+
+        threads = [
+            threading.Thread(target=writer, args=(i,))
+            for i in range(options["writers"])
+        ] + [
+            threading.Thread(target=reader, args=(i,))
+            for i in range(options["readers"])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        latencies.sort()
+        return {
+            "writes_per_s": len(latencies) / elapsed,
+            "reads_per_s": reads[0] / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+            "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+            "locked": locked[0],
+        }
@@ -0,0 +1,147 @@
+import itertools
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from benchmarks.seed import seed_graph
+from tweets.models import Tweet
+
+# Upper bounds per view. Query counts must not grow with the data set, so
+# they are exact; latency and memory leave headroom for slower machines.
+THRESHOLDS = {
+    "home": {"queries": 7, "p99_ms": 100, "peak_kb": 1024},
+    "profile": {"queries": 5, "p99_ms": 50, "peak_kb": 512},
+    "follower_list": {"queries": 4, "p99_ms": 500, "peak_kb": 4096},
+    "tweet_detail": {"queries": 4, "p99_ms": 30, "peak_kb": 512},
+    "like": {"queries": 12, "p99_ms": 30, "peak_kb": 256},
+    "unlike": {"queries": 7, "p99_ms": 30, "peak_kb": 256},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic graph on a throwaway test database and measure query "
+        "count, p50/p99 latency and peak memory per view. Fails when a view "
+        "exceeds its threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--follows", type=int, default=20)
+        parser.add_argument("--tweets", type=int, default=5000)
+        parser.add_argument("--likes", type=int, default=20000)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            users = seed_graph(
+                options["users"],
+                options["follows"],
+                options["tweets"],
+                options["likes"],
+                options["seed"],
+            )
+            results = self.run(users, options["iterations"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'view':<15}{'queries':>8}{'p50 ms':>9}{'p99 ms':>9}{'peak KB':>9}"
+        )
+        failures = []
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<15}{result['queries']:>8}{result['p50_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['peak_kb']:>9.0f}"
+            )
+            for metric, limit in THRESHOLDS[name].items():
+                if result[metric] > limit:
+                    failures.append(f"{name} {metric} {result[metric]:.2f} > {limit}")
+        if failures:
+            raise CommandError("regression: " + "; ".join(failures))
+
+    def run(self, users, iterations):
+        # a typical reader, and the most followed account for the list views
+        reader = users[len(users) // 2]
+        celebrity = users[0]
+        tweet = Tweet.objects.order_by("-like_count").first()
+        # like and unlike walk the same tweets so every request writes a row
+        tweet_ids = list(
+            Tweet.objects.exclude(like__user=reader).values_list("pk", flat=True)[
+                : iterations + 2
+            ]
+        )
+        like_ids = itertools.cycle(tweet_ids)
+        unlike_ids = itertools.cycle(tweet_ids)
+
+        client = Client()
+        client.force_login(reader)
+        celebrity_client = Client()
+        celebrity_client.force_login(celebrity)
+
+        requests = {
+            "home": lambda: client.get(reverse("accounts:home")),
+            "profile": lambda: client.get(
+                reverse("accounts:user_profile", kwargs={"pk": reader.profile.pk})
+            ),
+            "follower_list": lambda: celebrity_client.get(
+                reverse(
+                    "accounts:follower_list", kwargs={"username": celebrity.username}
+                )
+            ),
+            "tweet_detail": lambda: client.get(
+                reverse("tweets:detail", kwargs={"pk": tweet.pk})
+            ),
+            "like": lambda: client.post(
+                reverse("tweets:like", kwargs={"pk": next(like_ids)})
+            ),
+            "unlike": lambda: client.post(
+                reverse("tweets:unlike", kwargs={"pk": next(unlike_ids)})
+            ),
+        }
+        return {
+            name: self.measure(request, iterations)
+            for name, request in requests.items()
+        }
+
+    def measure(self, request, iterations):
+        request()  # warm up caches and the session
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        # read the count now; later requests reset the connection's query log
+        query_count = len(queries)
+        if response.status_code != 200:
+            raise CommandError(f"unexpected status {response.status_code}")
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        tracemalloc.start()
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "queries": query_count,
+            "p50_ms": statistics.median(timings),
+            "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+            "peak_kb": peak / 1024,
+        }
@@ -0,0 +1,155 @@
+import asyncio
+import random
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from accounts.models import Profile
+from benchmarks.loadtest import Request, run_load
+from benchmarks.seed import session_key
+from tweets.models import Tweet
+
+User = get_user_model()
+
+# Share of requests per action; reads dominate like on a real timeline app.
+MIX = {
+    "home": 50,
+    "profile": 10,
+    "detail": 10,
+    "api_timeline": 10,
+    "like": 12,
+    "follow": 4,
+    "tweet": 4,
+}
+
+
+def parse_mix(value):
+    mix = dict(MIX)
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in MIX or not weight.isdigit():
+            raise CommandError(f"invalid mix entry {part!r}")
+        mix[name] = int(weight)
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a mixed read/write workload against a running server sharing "
+        "this database, e.g. runserver after seed_data, and report "
+        "requests/sec and latency for reads (GET) and writes (POST)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=30)
+        parser.add_argument(
+            "--mix", type=parse_mix, default=MIX, help="e.g. home=80,like=20"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        make_request = self.workload(options)
+        result = asyncio.run(
+            run_load(
+                options["host"],
+                options["port"],
+                make_request,
+                options["concurrency"],
+                options["duration"],
+            )
+        )
+        self.stdout.write(
+            f"{'method':<8}{'requests':>10}{'req/s':>9}{'p50 ms':>9}"
+            f"{'p99 ms':>9}{'errors':>8}"
+        )
+        for method, row in [*result["methods"].items(), ("total", result)]:
+            self.stdout.write(
+                f"{method:<8}{row['requests']:>10}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['errors']:>8}"
+            )
+
+    def workload(self, options):
+        # Each client logs in as its own user and draws actions from its own
+        # seeded generator, so a run is repeatable. Likes and follows toggle,
+        # so the data stays the same size however long the run.
+        concurrency = options["concurrency"]
+        users = list(User.objects.order_by("pk")[:concurrency])
+        if not users:
+            raise CommandError("no users; run seed_data first")
+        usernames = list(
+            User.objects.order_by("pk").values_list("username", flat=True)[:1000]
+        )
+        profile_ids = list(
+            Profile.objects.order_by("pk").values_list("pk", flat=True)[:1000]
+        )
+        tweet_ids = list(
+            Tweet.objects.order_by("-created_at").values_list("pk", flat=True)[:1000]
+        )
+        if not tweet_ids:
+            raise CommandError("no tweets; run seed_data first")
+
+        token = get_random_string(32)
+        clients = []
+        for number in range(concurrency):
+            user = users[number % len(users)]
+            clients.append(
+                {
+                    "rng": random.Random(options["seed"] * 1000003 + number),
+                    "headers": [
+                        ("Cookie", f"sessionid={session_key(user)}; csrftoken={token}"),
+                        ("X-CSRFToken", token),
+                    ],
+                    "liked": set(),
+                    "followed": set(),
+                    "targets": [name for name in usernames if name != user.username],
+                }
+            )
+        names, weights = zip(*options["mix"].items())
+        form = [("Content-Type", "application/x-www-form-urlencoded")]
+
+        def make_request(number, iteration):
+            client = clients[number]
+            rng, headers = client["rng"], client["headers"]
+            action = rng.choices(names, weights)[0]
+            if action == "home":
+                return "GET", reverse("accounts:home"), headers
+            if action == "profile":
+                pk = rng.choice(profile_ids)
+                return (
+                    "GET",
+                    reverse("accounts:user_profile", kwargs={"pk": pk}),
+                    headers,
+                )
+            if action == "detail":
+                pk = rng.choice(tweet_ids)
+                return "GET", reverse("tweets:detail", kwargs={"pk": pk}), headers
+            if action == "api_timeline":
+                return "GET", reverse("api:timeline"), headers
+            if action == "like":
+                pk = rng.choice(tweet_ids)
+                liked = pk in client["liked"]
+                client["liked"] ^= {pk}
+                view = "tweets:unlike" if liked else "tweets:like"
+                return "POST", reverse(view, kwargs={"pk": pk}), headers
+            if action == "follow":
+                username = rng.choice(client["targets"])
+                followed = username in client["followed"]
+                client["followed"] ^= {username}
+                view = "accounts:unfollow_api" if followed else "accounts:follow_api"
+                return "POST", reverse(view, kwargs={"username": username}), headers
+            body = urlencode({"content": f"load test {number}-{iteration}"})
+            return Request(
+                "POST",
+                reverse("tweets:create"),
+                headers + form,
+                body.encode(),
+                expect=302,
+            )
+
+        return make_request
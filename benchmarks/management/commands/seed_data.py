@@ -0,0 +1,54 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.autocomplete import username_index
+from benchmarks.seed import seed_graph
+from tweets.models import Like, Tweet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with a deterministic synthetic graph: "
+        "power-law follows, tweets on a daily cycle and Zipf likes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--follows", type=int, default=20)
+        parser.add_argument("--tweets", type=int, default=100000)
+        parser.add_argument("--likes", type=int, default=300000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--password",
+            default="goodpass",
+            help="Password for every seeded user, hashed once.",
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.exists():
+            raise CommandError("the database already has users")
+        start = time.perf_counter()
+        with transaction.atomic():
+            seed_graph(
+                users=options["users"],
+                follows=options["follows"],
+                tweets=options["tweets"],
+                likes=options["likes"],
+                seed=options["seed"],
+                password=options["password"],
+            )
+        self.stdout.write(
+            f"seeded {options['users']} users, {Tweet.objects.count()} tweets "
+            f"and {Like.objects.count()} likes in {time.perf_counter() - start:.1f}s"
+        )
+        # bulk inserts send no post_save and queue no tasks, so build what the
+        # signals and follow tasks would have
+        username_index.load()
+        call_command("rebuild_search_index", stdout=self.stdout)
+        call_command("build_recommendations", stdout=self.stdout)
@@ -0,0 +1,188 @@
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore
+from django.utils import timezone
+
+from accounts.models import FriendShip, Profile
+from database.bulk import insert_rows
+from timelines.models import TimelineEntry
+from tweets.models import Like, Tweet
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+HISTORY_DAYS = 30
+# Relative tweet volume by local hour: lowest before dawn, peaking at 20-21.
+HOURLY_WEIGHTS = [
+    6,
+    4,
+    3,
+    2,
+    1.5,
+    1.5,
+    2,
+    3,
+    4,
+    5,
+    5,
+    6,
+    7,
+    6,
+    6,
+    6,
+    6,
+    7,
+    8,
+    9,
+    10,
+    10,
+    9,
+    8,
+]
+
+
+@contextmanager
+def explicit_created_at(model):
+    # auto_now_add would overwrite the generated timestamps on bulk_create
+    field = model._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def zipf_weights(n, alpha):
+    return [1 / (rank + 1) ** alpha for rank in range(n)]
+
+
+def session_key(user):
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def diurnal_times(rng, now, k):
+    # a random day in the history, then an hour weighted by HOURLY_WEIGHTS
+    midnight = timezone.localtime(now).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    hours = rng.choices(range(24), HOURLY_WEIGHTS, k=k)
+    times = []
+    for hour in hours:
+        created_at = midnight + timedelta(
+            days=-rng.randrange(HISTORY_DAYS), hours=hour, seconds=rng.random() * 3600
+        )
+        if created_at > now:  # later today
+            created_at -= timedelta(days=1)
+        times.append(created_at)
+    return times
+
+
+def seed_graph(
+    users=1000, follows=20, tweets=5000, likes=20000, seed=0, password=None, now=None
+):
+    # Follow targets and tweet authors follow a power law, likes are Zipf
+    # distributed over tweets and tweets are posted on a daily cycle.
+    # Counters and inboxes are written directly so the data matches what the
+    # views maintain; only users and tweets, whose ids are needed, go
+    # through bulk_create. The same seed and now give the same data. Returns the
+    # users, most followed first.
+    rng = random.Random(seed)
+    now = now or timezone.now()
+    # hashing is deliberately slow, so every user shares one hash
+    password = make_password(password) if password else "!"
+    user_objs = User.objects.bulk_create(
+        (User(username=f"user{i}", password=password) for i in range(users)),
+        batch_size=BATCH_SIZE,
+    )
+    ids = [user.pk for user in user_objs]
+    # cumulative once, so each draw below is a bisection and not O(users)
+    popularity = list(itertools.accumulate(zipf_weights(users, 1.0)))
+
+    followers = {pk: set() for pk in ids}
+    for pk in ids:
+        for followed in rng.choices(ids, cum_weights=popularity, k=follows):
+            if followed != pk:
+                followers[followed].add(pk)
+    insert_rows(
+        FriendShip,
+        ["following_id", "followed_id"],
+        (
+            (follower, followed)
+            for followed, follower_ids in followers.items()
+            for follower in follower_ids
+        ),
+    )
+    following_counts = dict.fromkeys(ids, 0)
+    for follower_ids in followers.values():
+        for follower in follower_ids:
+            following_counts[follower] += 1
+    insert_rows(
+        Profile,
+        ["user_id", "followers_count", "following_count", "unread_notifications"],
+        ((pk, len(followers[pk]), following_counts[pk], 0) for pk in ids),
+    )
+
+    like_targets = rng.choices(range(tweets), zipf_weights(tweets, 1.1), k=likes)
+    likes_by_tweet = {}
+    for index in like_targets:
+        likes_by_tweet.setdefault(index, set()).add(rng.choice(ids))
+
+    # how much someone tweets is skewed too, but independent of popularity
+    active = ids[:]
+    rng.shuffle(active)
+    authors = rng.choices(active, zipf_weights(users, 1.0), k=tweets)
+    created = diurnal_times(rng, now, tweets)
+    with explicit_created_at(Tweet):
+        tweet_objs = Tweet.objects.bulk_create(
+            (
+                Tweet(
+                    user_id=author,
+                    content=f"tweet {i}",
+                    created_at=created[i],
+                    like_count=len(likes_by_tweet.get(i, ())),
+                )
+                for i, author in enumerate(authors)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    insert_rows(
+        Like,
+        ["tweet_id", "user_id", "created_at"],
+        (
+            (
+                tweet_objs[index].pk,
+                user,
+                # most likes land within a few hours of the tweet
+                min(now, created[index] + timedelta(hours=rng.expovariate(0.5))),
+            )
+            for index, user_ids in likes_by_tweet.items()
+            for user in sorted(user_ids)
+        ),
+    )
+    insert_rows(
+        TimelineEntry,
+        ["owner_id", "tweet_id", "author_id", "created_at"],
+        (
+            (owner, tweet.pk, tweet.user_id, tweet.created_at)
+            for tweet in tweet_objs
+            for owner in (tweet.user_id, *followers[tweet.user_id])
+        ),
+    )
+
+    return sorted(user_objs, key=lambda user: -len(followers[user.pk]))
@@ -0,0 +1,283 @@
+import asyncio
+import re
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.timezone import get_current_timezone
+
+from accounts.models import FriendShip
+from recommendations.models import Recommendation
+from timelines.models import TimelineEntry
+from tweets.models import Like, Tweet
+
+from .loadtest import Request, run_load
+from .management.commands import loadtest
+from .management.commands.bench_views import THRESHOLDS, Command
+from .seed import seed_graph
+
+User = get_user_model()
+
+
+class TestSeedGraph(TestCase):
+    def test_success_seed(self):
+        users = seed_graph(users=30, follows=5, tweets=100, likes=200)
+        self.assertEqual(len(users), 30)
+        self.assertEqual(Tweet.objects.count(), 100)
+        self.assertEqual(
+            sum(Tweet.objects.values_list("like_count", flat=True)),
+            Like.objects.count(),
+        )
+        most_followed = FriendShip.objects.filter(followed=users[0]).count()
+        self.assertEqual(users[0].profile.followers_count, most_followed)
+        self.assertGreater(most_followed, FriendShip.objects.count() / 30)
+
+
+class TestSeedShapes(TestCase):
+    now = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+
+    def seed(self):
+        seed_graph(
+            users=30,
+            follows=5,
+            tweets=300,
+            likes=600,
+            password="goodpass",
+            now=self.now,
+        )
+        return list(
+            Like.objects.order_by("tweet__created_at", "user__username").values_list(
+                "tweet__user__username", "tweet__created_at", "user__username"
+            )
+        )
+
+    def test_deterministic_by_seed(self):
+        first = self.seed()
+        User.objects.all().delete()
+        self.assertEqual(self.seed(), first)
+
+    def test_shared_password_hash(self):
+        self.seed()
+        self.assertEqual(User.objects.values("password").distinct().count(), 1)
+        self.assertTrue(User.objects.first().check_password("goodpass"))
+
+    def test_timestamps(self):
+        self.seed()
+        self.assertFalse(Tweet.objects.filter(created_at__gt=self.now).exists())
+        self.assertFalse(
+            Like.objects.filter(created_at__lt=F("tweet__created_at")).exists()
+        )
+        hours = [
+            created_at.astimezone(get_current_timezone()).hour
+            for created_at in Tweet.objects.values_list("created_at", flat=True)
+        ]
+        evening = sum(19 <= hour <= 22 for hour in hours)
+        night = sum(2 <= hour <= 5 for hour in hours)
+        self.assertGreater(evening, night * 2)
+
+    def test_seed_data_command(self):
+        out = StringIO()
+        call_command("seed_data", users=20, follows=3, tweets=50, likes=80, stdout=out)
+        self.assertIn("seeded 20 users, 50 tweets", out.getvalue())
+        self.assertIn("indexed 50 tweets", out.getvalue())
+        self.assertTrue(Recommendation.objects.exists())
+        with self.assertRaisesMessage(CommandError, "already has users"):
+            call_command("seed_data", users=20, stdout=StringIO())
+
+
+class TestLoadWorkload(TestCase):
+    def test_requests_succeed(self):
+        seed_graph(users=30, follows=5, tweets=100, likes=200)
+        make_request = loadtest.Command().workload(
+            {"concurrency": 2, "mix": loadtest.MIX, "seed": 0}
+        )
+        methods = set()
+        for iteration in range(60):
+            request = Request(*make_request(iteration % 2, iteration))
+            headers = dict(request.headers)
+            self.client.cookies.load(headers.pop("Cookie"))
+            response = self.client.generic(
+                request.method,
+                request.path,
+                request.body,
+                headers.get("Content-Type", "application/octet-stream"),
+            )
+            self.assertEqual(response.status_code, request.expect or 200, request.path)
+            methods.add(request.method)
+        self.assertEqual(methods, {"GET", "POST"})
+
+
+class TestViewBenchmarks(TestCase):
+    def test_query_counts_within_thresholds(self):
+        users = seed_graph(users=30, follows=5, tweets=100, likes=200)
+        results = Command().run(users, iterations=2)
+        self.assertEqual(set(results), set(THRESHOLDS))
+        for name, result in results.items():
+            self.assertLessEqual(result["queries"], THRESHOLDS[name]["queries"], name)
+
+
+class TestQueryPlans(TestCase):
+    # a full table scan, or a sort the index order could have avoided
+    BAD_PLAN = re.compile(r"\bSCAN \S+$|TEMP B-TREE", re.MULTILINE)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_graph(users=30, follows=5, tweets=100, likes=200)
+        cls.reader = cls.users[15]
+
+    def selects(self, request):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.startswith("SELECT"):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = request()
+            self.assertLess(response.status_code, 400)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        return queries
+
+    def plan(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return "\n".join(row[3] for row in cursor.fetchall())
+
+    def test_view_queries_use_indexes(self):
+        tweet = TimelineEntry.objects.filter(owner=self.reader).first().tweet
+        celebrity = self.users[0]
+        self.client.force_login(self.reader)
+        requests = {
+            "home": lambda: self.client.get(reverse("accounts:home")),
+            "profile": lambda: self.client.get(
+                reverse("accounts:user_profile", kwargs={"pk": self.reader.profile.pk})
+            ),
+            "following_list": lambda: self.client.get(
+                reverse(
+                    "accounts:following_list", kwargs={"username": self.reader.username}
+                )
+            ),
+            "follower_list": lambda: self.client.get(
+                reverse(
+                    "accounts:follower_list", kwargs={"username": self.reader.username}
+                )
+            ),
+            "tweet_detail": lambda: self.client.get(
+                reverse("tweets:detail", kwargs={"pk": tweet.pk})
+            ),
+            "like": lambda: self.client.post(
+                reverse("tweets:like", kwargs={"pk": tweet.pk})
+            ),
+            "unlike": lambda: self.client.post(
+                reverse("tweets:unlike", kwargs={"pk": tweet.pk})
+            ),
+            "follow": lambda: self.client.post(
+                reverse("accounts:follow_api", kwargs={"username": celebrity.username})
+            ),
+            "api_timeline": lambda: self.client.get(reverse("api:timeline")),
+            "api_user_tweets": lambda: self.client.get(
+                reverse("api:user_tweets", kwargs={"username": celebrity.username})
+            ),
+            "api_followers": lambda: self.client.get(
+                reverse("api:followers", kwargs={"username": celebrity.username})
+            ),
+            "api_followings": lambda: self.client.get(
+                reverse("api:followings", kwargs={"username": self.reader.username})
+            ),
+        }
+        for name, request in requests.items():
+            selects = self.selects(request)
+            self.assertTrue(selects, name)
+            for sql, params in selects:
+                plan = self.plan(sql, params)
+                self.assertNotRegex(plan, self.BAD_PLAN, f"{name}: {sql}")
+
+    def test_hot_lookups_use_composite_indexes(self):
+        user = self.reader
+        plans = {
+            "tweet_created_id_idx": Tweet.objects.order_by("-created_at", "-id")[:20],
+            "tweet_user_created_id_idx": Tweet.objects.filter(user=user).order_by(
+                "-created_at", "-id"
+            )[:20],
+            "like_user_tweet_idx": Like.objects.filter(
+                user=user, tweet__in=[1, 2, 3]
+            ).values_list("tweet_id"),
+            "follow_followed_following_idx": FriendShip.objects.filter(
+                followed=user
+            ).values_list("following_id"),
+        }
+        for index, queryset in plans.items():
+            plan = queryset.explain()
+            self.assertNotRegex(plan, self.BAD_PLAN, index)
+            self.assertIn(index, plan)
+
+
+class TestLoadDriver(SimpleTestCase):
+    async def serve(self, reader, writer):
+        # keep-alive for GET, close after a chunked response for POST
+        try:
+            await self.respond(reader, writer)
+        except asyncio.IncompleteReadError:  # the client hung up
+            writer.close()
+
+    async def respond(self, reader, writer):
+        while request := await reader.readuntil(b"\r\n\r\n"):
+            if request.startswith(b"GET"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            else:
+                writer.write(
+                    b"HTTP/1.1 302 Found\r\nTransfer-Encoding: chunked\r\n"
+                    b"Connection: close\r\n\r\n2\r\nok\r\n0\r\n\r\n"
+                )
+                await writer.drain()
+                writer.close()
+                return
+            await writer.drain()
+
+    async def test_counts_requests_and_errors(self):
+        server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            result = await run_load(
+                "127.0.0.1",
+                port,
+                lambda client, i: ("POST" if i == 1 else "GET", "/", []),
+                concurrency=2,
+                duration=0.2,
+            )
+        finally:
+            server.close()
+        self.assertEqual(result["errors"], 2)
+        self.assertGreater(result["requests"], 2)
+        self.assertGreater(result["rps"], 0)
+        self.assertEqual(result["methods"]["POST"]["errors"], 2)
+        self.assertEqual(result["methods"]["POST"]["requests"], 0)
+
+    async def test_expected_status(self):
+        server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            result = await run_load(
+                "127.0.0.1",
+                port,
+                lambda client, i: (
+                    Request("POST", "/", [], expect=302)
+                    if i == 1
+                    else Request("GET", "/", [], expect=201)
+                ),
+                concurrency=2,
+                duration=0.2,
+            )
+        finally:
+            server.close()
+        self.assertEqual(result["methods"]["POST"]["requests"], 2)
+        self.assertEqual(result["methods"]["GET"]["requests"], 0)
+        self.assertEqual(result["errors"], result["methods"]["GET"]["errors"])
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class DatabaseConfig(AppConfig):
+    name = "database"
+
+    def ready(self):
+        from . import signals  # noqa: F401
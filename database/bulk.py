@@ -0,0 +1,35 @@
+from itertools import islice
+
+from django.db import connection, models
+
+BATCH_SIZE = 5000
+
+
+def insert_rows(model, names, rows, batch_size=BATCH_SIZE):
+    # Plain executemany for rows of values in `names` order. bulk_create
+    # builds a model instance per row and compiles SQL for every few hundred
+    # of them, which costs several times the inserts themselves. No defaults
+    # are applied and no signals are sent. Returns the number of rows.
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in names]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(model._meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    adapt = connection.ops.adapt_datetimefield_value
+    datetimes = [
+        i for i, field in enumerate(fields) if isinstance(field, models.DateTimeField)
+    ]
+    rows = iter(rows)
+    count = 0
+    with connection.cursor() as cursor:
+        while batch := list(islice(rows, batch_size)):
+            if datetimes:
+                batch = [list(row) for row in batch]
+                for row in batch:
+                    for i in datetimes:
+                        row[i] = adapt(row[i])
+            cursor.executemany(sql, batch)
+            count += len(batch)
+    return count
@@ -0,0 +1,125 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+_profile = ContextVar("sql_profile", default=None)
+
+
+class QueryProfile:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # Django hands the wrapper the SQL with placeholders, so the same
+        # template with different params is the N+1 pattern and the same
+        # template with the same params is a plain duplicate.
+        self.templates = Counter()
+        self.executions = Counter()
+
+    def add(self, sql, params, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.templates[sql] += 1
+        self.executions[sql, repr(params)] += 1
+
+    def repeated(self, threshold):
+        return [
+            {"sql": sql, "count": count}
+            for sql, count in self.templates.most_common()
+            if count >= threshold
+        ]
+
+    def duplicates(self):
+        return sum(count - 1 for count in self.executions.values())
+
+
+def record_queries(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add(sql, params, time.perf_counter() - start)
+
+
+def install(connection):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class QueryProfilingMiddleware:
+    # Records the SQL of a sample of requests. Queries run in whichever
+    # thread the ORM call lands in, so the profile travels in a contextvar
+    # and a wrapper installed on every connection picks it up.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SQL_PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.SQL_PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = QueryProfile()
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.report(request, response, profile, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.SQL_PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+        profile = QueryProfile()
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.report(request, response, profile, time.perf_counter() - start)
+
+    def report(self, request, response, profile, seconds):
+        match = request.resolver_match
+        repeated = profile.repeated(settings.SQL_PROFILING_REPEAT_THRESHOLD)
+        record = {
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.count,
+            "db_ms": round(profile.seconds * 1000, 2),
+            "total_ms": round(seconds * 1000, 2),
+            "duplicates": profile.duplicates(),
+            "repeated": repeated,
+        }
+        logger.log(
+            logging.WARNING if repeated else logging.INFO,
+            json.dumps(record, ensure_ascii=False),
+        )
+        timing = (
+            f'db;dur={record["db_ms"]};desc="{profile.count} queries", '
+            f'app;dur={record["total_ms"]}'
+        )
+        if "Server-Timing" in response.headers:
+            timing = f'{response.headers["Server-Timing"]}, {timing}'
+        response.headers["Server-Timing"] = timing
+        return response
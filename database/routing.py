@@ -0,0 +1,91 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PIN_COOKIE = "db_primary"
+PRIMARY_ONLY_APPS = {"sessions"}
+
+_state = ContextVar("database_routing", default=None)
+
+
+class RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.replica_reads = False
+        self.wrote = False
+
+
+class PrimaryReplicaRouter:
+    # Reads go to a replica only inside a request for one of
+    # DATABASE_REPLICA_VIEWS that has not written yet and whose session has
+    # not written in the last DATABASE_PIN_SECONDS.
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or state.pinned
+            or not state.replica_reads
+            or not settings.DATABASE_REPLICAS
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+        ):
+            return "default"
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _state.set(RequestState(PIN_COOKIE in request.COOKIES))
+        try:
+            return self.pin(self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = _state.set(RequestState(PIN_COOKIE in request.COOKIES))
+        try:
+            return self.pin(await self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        state.replica_reads = (
+            request.resolver_match.view_name in settings.DATABASE_REPLICA_VIEWS
+        )
+
+    def pin(self, response):
+        # keep this client's reads on the primary until replicas catch up
+        if _state.get().wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.DATABASE_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,35 @@
+from types import MethodType
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import profiling
+
+
+def _begin_immediate(self):
+    # A deferred transaction that read first and then writes cannot wait on
+    # busy_timeout: SQLite fails the lock upgrade at once with "database is
+    # locked". Taking the write lock at BEGIN makes it queue instead.
+    self.cursor().execute("BEGIN IMMEDIATE")
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    if settings.SQLITE_BEGIN_IMMEDIATE:
+        connection._start_transaction_under_autocommit = MethodType(
+            _begin_immediate, connection
+        )
+    else:
+        connection.__dict__.pop("_start_transaction_under_autocommit", None)
+
+
+@receiver(connection_created)
+def profile_queries(sender, connection, **kwargs):
+    if settings.SQL_PROFILING_SAMPLE_RATE:
+        profiling.install(connection)
@@ -0,0 +1,166 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from .profiling import QueryProfilingMiddleware, install, record_queries
+from .routing import PIN_COOKIE, PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from .signals import tune_sqlite
+from .transactions import deferred_atomic
+
+User = get_user_model()
+router = PrimaryReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=["replica0"])
+class TestPrimaryReplicaRouter(SimpleTestCase):
+    def route(self, url, write=False, cookies=None):
+        decisions = []
+
+        def view(request):
+            decisions.append(router.db_for_read(User))
+            if write:
+                router.db_for_write(User)
+            decisions.append(router.db_for_read(User))
+            decisions.append(router.db_for_read(Session))
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = RequestFactory().get(url)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(url)
+        return decisions, middleware(request)
+
+    def test_replica_view_reads_from_replica(self):
+        decisions, response = self.route(reverse("accounts:home"))
+        self.assertEqual(decisions, ["replica0", "replica0", "default"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_other_views_read_from_primary(self):
+        decisions, _ = self.route(reverse("tweets:detail", kwargs={"pk": 1}))
+        self.assertEqual(decisions, ["default", "default", "default"])
+
+    def test_write_pins_request_and_client(self):
+        decisions, response = self.route(reverse("accounts:home"), write=True)
+        self.assertEqual(decisions, ["replica0", "default", "default"])
+        self.assertEqual(
+            response.cookies[PIN_COOKIE]["max-age"], settings.DATABASE_PIN_SECONDS
+        )
+        decisions, _ = self.route(reverse("accounts:home"), cookies={PIN_COOKIE: "1"})
+        self.assertEqual(decisions, ["default", "default", "default"])
+
+    def test_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(User), "default")
+        self.assertTrue(router.allow_migrate("default", "accounts"))
+        self.assertFalse(router.allow_migrate("replica0", "accounts"))
+
+
+class TestSqlitePragmas(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        self.assertEqual(self.pragma("busy_timeout"), settings.SQLITE_BUSY_TIMEOUT)
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(
+            self.pragma("cache_size"), settings.SQLITE_PRAGMAS["cache_size"]
+        )
+
+
+class TestSqliteBeginImmediate(TransactionTestCase):
+    def begin(self, atomic=transaction.atomic):
+        # the in-memory test database is never reconnected, so rerun the hook
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        tune_sqlite(sender=None, connection=wrapper)
+        self.addCleanup(tune_sqlite, sender=None, connection=wrapper)
+        with CaptureQueriesContext(connection) as queries:
+            with atomic():
+                User.objects.exists()
+        return [query["sql"] for query in queries if "BEGIN" in query["sql"]]
+
+    def test_atomic_begins_immediate(self):
+        self.assertEqual(self.begin(), ["BEGIN IMMEDIATE"])
+
+    @override_settings(SQLITE_BEGIN_IMMEDIATE=False)
+    def test_deferred_when_disabled(self):
+        self.assertEqual(self.begin(), ["BEGIN"])
+
+    def test_deferred_atomic_for_read_snapshots(self):
+        self.assertEqual(self.begin(deferred_atomic), ["BEGIN"])
+        # the override is back for the next transaction
+        self.assertEqual(self.begin(), ["BEGIN IMMEDIATE"])
+
+
+@override_settings(SQL_PROFILING_SAMPLE_RATE=1.0)
+class TestQueryProfiling(TestCase):
+    def setUp(self):
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        install(wrapper)
+        self.addCleanup(wrapper.execute_wrappers.remove, record_queries)
+        self.user = User.objects.create_user(username="tester", password="testpass0")
+
+    def profile(self, view, level):
+        middleware = QueryProfilingMiddleware(view)
+        request = RequestFactory().get("/")
+        request.resolver_match = None
+        with self.assertLogs("database.profiling", level) as logs:
+            response = middleware(request)
+        return response, json.loads(logs.records[-1].getMessage())
+
+    def test_reports_repeated_templates(self):
+        ids = list(range(1, 7))
+
+        def view(request):
+            for pk in ids:
+                User.objects.filter(pk=pk).exists()
+            User.objects.filter(pk=1).exists()
+            return HttpResponse()
+
+        response, record = self.profile(view, "WARNING")
+        self.assertEqual(record["queries"], 7)
+        self.assertEqual(record["duplicates"], 1)
+        self.assertEqual(len(record["repeated"]), 1)
+        self.assertEqual(record["repeated"][0]["count"], 7)
+        self.assertIn('desc="7 queries"', response.headers["Server-Timing"])
+
+    def test_few_distinct_queries_log_info(self):
+        def view(request):
+            User.objects.count()
+            return HttpResponse()
+
+        _, record = self.profile(view, "INFO")
+        self.assertEqual(record["queries"], 1)
+        self.assertEqual(record["repeated"], [])
+
+    def test_async_view(self):
+        self.client.force_login(self.user)
+        with self.assertLogs("database.profiling", "INFO") as logs:
+            response = self.client.get(reverse("accounts:home"))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["view"], "accounts:home")
+        self.assertGreater(record["queries"], 0)
+        self.assertIn("Server-Timing", response.headers)
+
+    @override_settings(SQL_PROFILING_SAMPLE_RATE=0)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryProfilingMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def deferred_atomic(using=DEFAULT_DB_ALIAS):
+    # atomic() with a plain deferred BEGIN even under SQLITE_BEGIN_IMMEDIATE,
+    # for long read-only snapshots: BEGIN IMMEDIATE would hold the write lock
+    # and stall every writer until the block ends.
+    connection = connections[using]
+    connection.ensure_connection()
+    immediate = connection.__dict__.pop("_start_transaction_under_autocommit", None)
+    try:
+        with transaction.atomic(using):
+            yield
+    finally:
+        if immediate is not None:
+            connection._start_transaction_under_autocommit = immediate
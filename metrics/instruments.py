@@ -0,0 +1,19 @@
+from django.conf import settings
+
+from .registry import Registry
+
+registry = Registry(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to produce a response, by URL name.",
+    ["view", "method", "status"],
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds",
+    "Time spent running SQL while producing a response, by URL name.",
+    ["view"],
+)
+TWEETS_CREATED = registry.counter("tweets_created_total", "Tweets posted.")
+LIKES_CREATED = registry.counter("likes_created_total", "Likes added.")
+FOLLOWS_CREATED = registry.counter("follows_created_total", "Follows created.")
@@ -0,0 +1,63 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import instruments
+
+_db_seconds = ContextVar("metrics_db_seconds", default=None)
+
+
+def time_queries(execute, sql, params, many, context):
+    total = _db_seconds.get()
+    if total is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        total[0] += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        total = [0.0]
+        token = _db_seconds.set(total)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _db_seconds.reset(token)
+        self.observe(request, response, time.perf_counter() - start, total[0])
+        return response
+
+    async def __acall__(self, request):
+        total = [0.0]
+        token = _db_seconds.set(total)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _db_seconds.reset(token)
+        self.observe(request, response, time.perf_counter() - start, total[0])
+        return response
+
+    def observe(self, request, response, seconds, db_seconds):
+        # URL names keep the label set small; unresolved paths share one
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        instruments.REQUEST_SECONDS.observe(
+            seconds, view=view, method=request.method, status=response.status_code
+        )
+        instruments.REQUEST_DB_SECONDS.observe(db_seconds, view=view)
+        instruments.registry.flush()
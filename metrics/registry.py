@@ -0,0 +1,234 @@
+import fcntl
+import json
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            samples = [
+                [list(key), self._copy(value)] for key, value in self._values.items()
+            ]
+        return {
+            "type": self.type,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "samples": samples,
+        }
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # per-bucket counts (not cumulative), then +Inf, sum
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                i = len(self.buckets)
+            counts[i] += 1
+            counts[-1] += value
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+    def _copy(self, value):
+        return list(value)
+
+
+class Registry:
+    # Under several worker processes each one writes its snapshot to
+    # <directory>/<pid>-<token>.json at most every flush_interval seconds, and
+    # collect() sums the files. The random token keeps a recycled pid from
+    # overwriting an exited worker's file; collect() folds the files of
+    # exited workers into dead.json, so counters never go backwards and the
+    # directory holds one file per live worker plus one.
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.metrics = {}
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._flushed = 0.0
+        self._pid = None
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"{metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def _path(self):
+        # re-derived after a fork, so children don't share the parent's file
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._name = f"{self._pid}-{secrets.token_hex(4)}.json"
+        return self.directory / self._name
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if self.directory is None or (
+            not force and now - self._flushed < self.flush_interval
+        ):
+            return
+        self._flushed = now
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write(self._path(), self.snapshot())
+
+    def collect(self):
+        if self.directory is None:
+            return self.snapshot()
+        self.flush(force=True)
+        # one collector at a time, so two scrapes can't fold the same file twice
+        with open(self.directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._compact()
+            return merge(_read(self.directory.glob("*.json")))
+
+    def _compact(self):
+        dead = [
+            path
+            for path in self.directory.glob("*.json")
+            if path.stem.partition("-")[0].isdigit()
+            and not _alive(int(path.stem.partition("-")[0]))
+        ]
+        if not dead:
+            return
+        aggregate = self.directory / "dead.json"
+        _write(aggregate, merge(_read([aggregate, *dead])))
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read(paths):
+    snapshots = []
+    for path in paths:
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):  # missing, or a worker is replacing it
+            continue
+    return snapshots
+
+
+def _write(path, snapshot):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(snapshot))
+    os.replace(tmp, path)
+
+
+def merge(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if key not in target["samples"]:
+                    target["samples"][key] = value
+                elif isinstance(value, list):
+                    target["samples"][key] = [
+                        a + b for a, b in zip(target["samples"][key], value)
+                    ]
+                else:
+                    target["samples"][key] += value
+    for metric in merged.values():
+        metric["samples"] = [[list(k), v] for k, v in metric["samples"].items()]
+    return merged
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snapshot):
+    # Prometheus text exposition format 0.0.4
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for values, value in sorted(metric["samples"]):
+            if metric["type"] == "counter":
+                lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], "+Inf"], value[:-1]):
+                cumulative += count
+                le = [("le", bound if bound == "+Inf" else _number(float(bound)))]
+                lines.append(f"{name}_bucket{_labels(names, values, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, values)} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from accounts.models import FriendShip
+from tweets.models import Like, Tweet
+
+from . import instruments
+from .middleware import time_queries
+
+CREATED_COUNTERS = {
+    Tweet: instruments.TWEETS_CREATED,
+    Like: instruments.LIKES_CREATED,
+    FriendShip: instruments.FOLLOWS_CREATED,
+}
+
+
+@receiver(post_save, sender=Tweet)
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=FriendShip)
+def count_created(sender, instance, created, using, **kwargs):
+    # a rolled-back write is not counted
+    if created:
+        transaction.on_commit(CREATED_COUNTERS[sender].inc, using=using)
+
+
+@receiver(connection_created)
+def time_connection_queries(sender, connection, **kwargs):
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+import re
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from tweets.models import Tweet
+
+from .registry import Registry, render
+
+User = get_user_model()
+
+
+def count_in_child(directory):
+    registry = Registry(directory)
+    registry.counter("likes_total", "Likes.").inc(2)
+    registry.histogram("latency_seconds", "Latency.", buckets=[0.1]).observe(0.05)
+    registry.flush(force=True)
+
+
+class TestRegistry(SimpleTestCase):
+    def test_render(self):
+        registry = Registry()
+        requests = registry.counter("requests_total", "Requests.", ["view"])
+        requests.inc(view='say "hi"')
+        requests.inc(2, view='say "hi"')
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=[0.1, 1])
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(3)
+        self.assertEqual(
+            render(registry.snapshot()),
+            "# HELP latency_seconds Latency.\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{le="0.1"} 1\n'
+            'latency_seconds_bucket{le="1.0"} 2\n'
+            'latency_seconds_bucket{le="+Inf"} 3\n'
+            "latency_seconds_sum 3.55\n"
+            "latency_seconds_count 3\n"
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{view="say \\"hi\\""} 3\n',
+        )
+
+    def test_rejects_wrong_labels(self):
+        counter = Registry().counter("requests_total", "Requests.", ["view"])
+        with self.assertRaises(ValueError):
+            counter.inc(path="/")
+
+    def test_sums_worker_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            child = multiprocessing.get_context("fork").Process(
+                target=count_in_child, args=(directory,)
+            )
+            child.start()
+            child.join()
+            registry = Registry(directory)
+            registry.counter("likes_total", "Likes.").inc(3)
+            registry.histogram("latency_seconds", "Latency.", buckets=[0.1]).observe(1)
+            text = render(registry.collect())
+        self.assertIn("likes_total 5\n", text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 2\n', text)
+
+    def test_compacts_exited_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for _ in range(2):
+                child = multiprocessing.get_context("fork").Process(
+                    target=count_in_child, args=(directory,)
+                )
+                child.start()
+                child.join()
+            # two registries under one pid stand in for a recycled pid
+            for amount in (1, 3):
+                registry = Registry(directory)
+                registry.counter("likes_total", "Likes.").inc(amount)
+                registry.flush(force=True)
+            self.assertIn("likes_total 8\n", render(registry.collect()))
+            files = os.listdir(directory)
+            self.assertIn("dead.json", files)
+            self.assertEqual(len(files), 4)  # dead.json, .lock and both registries
+            self.assertIn("likes_total 8\n", render(registry.collect()))
+
+
+class TestMetricsView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="testpass0")
+        self.client.force_login(self.user)
+
+    def sample(self, line):
+        text = self.client.get(reverse("metrics:metrics")).content.decode()
+        match = re.search(rf"^{re.escape(line)} (\S+)$", text, re.MULTILINE)
+        return float(match.group(1)) if match else 0
+
+    def test_request_latency_by_view(self):
+        line = (
+            "http_request_duration_seconds_count"
+            '{view="accounts:home",method="GET",status="200"}'
+        )
+        before = self.sample(line)
+        self.client.get(reverse("accounts:home"))
+        self.client.get(reverse("accounts:home"))
+        self.assertEqual(self.sample(line), before + 2)
+        self.assertGreater(
+            self.sample('http_request_db_seconds_count{view="accounts:home"}'), 0
+        )
+
+    def test_domain_counters(self):
+        tweets = self.sample("tweets_created_total")
+        likes = self.sample("likes_created_total")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("tweets:create"), {"content": "hello"})
+            tweet = Tweet.objects.get()
+            self.client.post(reverse("tweets:like", kwargs={"pk": tweet.pk}))
+        self.assertEqual(self.sample("tweets_created_total"), tweets + 1)
+        self.assertEqual(self.sample("likes_created_total"), likes + 1)
+
+    def test_rolled_back_writes_are_not_counted(self):
+        tweets = self.sample("tweets_created_total")
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Tweet.objects.create(user=self.user, content="hello")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.sample("tweets_created_total"), tweets)
+
+    def test_forbidden_from_other_hosts(self):
+        self.client.logout()
+        response = self.client.get(reverse("metrics:metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 403)
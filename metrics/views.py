@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+from .instruments import registry
+from .registry import render
+
+
+def metrics_view(request):
+    if not (
+        request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+        or request.user.is_staff
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        render(registry.collect()), content_type="text/plain; version=0.0.4"
+    )
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,11 +41,25 @@ INSTALLED_APPS = [
     "accounts.apps.AccountsConfig",
     "tweets.apps.TweetsConfig",
     "welcome.apps.WelcomeConfig",
+    "timelines.apps.TimelinesConfig",
+    "benchmarks.apps.BenchmarksConfig",
+    "streaming.apps.StreamingConfig",
+    "search.apps.SearchConfig",
+    "recommendations.apps.RecommendationsConfig",
+    "database.apps.DatabaseConfig",
+    "metrics.apps.MetricsConfig",
+    "tasks.apps.TasksConfig",
+    "notifications.apps.NotificationsConfig",
+    "api.apps.ApiConfig",
+    "transfer.apps.TransferConfig",
     # "debug_toolbar",
 ]
 
 MIDDLEWARE = [
+    "database.profiling.QueryProfilingMiddleware",
+    "metrics.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "database.routing.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -78,10 +93,85 @@ WSGI_APPLICATION = "mysite.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+# DB_ENGINE=django.db.backends.postgresql with DB_NAME, DB_USER, DB_PASSWORD,
+# DB_HOST and DB_PORT in production; DB_REPLICA_HOSTS is a comma-separated
+# list of read replicas sharing those credentials. SQLite stays the default
+# for local work.
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": os.environ.get("DB_ENGINE", "django.db.backends.sqlite3"),
+        "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+        "USER": os.environ.get("DB_USER", ""),
+        "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+        "HOST": os.environ.get("DB_HOST", ""),
+        "PORT": os.environ.get("DB_PORT", ""),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+DB_REPLICA_HOSTS = os.environ.get("DB_REPLICA_HOSTS", "")
+for i, host in enumerate(filter(None, DB_REPLICA_HOSTS.split(","))):
+    DATABASES[f"replica{i}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["database.routing.PrimaryReplicaRouter"]
+# Views whose reads may lag the primary by a moment. A client that wrote is
+# kept on the primary for DATABASE_PIN_SECONDS to read its own writes.
+DATABASE_REPLICA_VIEWS = [
+    "accounts:home",
+    "accounts:user_profile",
+    "accounts:following_list",
+    "accounts:follower_list",
+]
+DATABASE_PIN_SECONDS = 5
+# milliseconds a SQLite writer waits for the lock before "database is locked"
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+# Applied to every new SQLite connection. synchronous=NORMAL only risks the
+# last commits on power loss in WAL mode; cache_size is negative for KiB.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64000,
+    "busy_timeout": SQLITE_BUSY_TIMEOUT,
+}
+# Start atomic() blocks with BEGIN IMMEDIATE so a transaction that reads
+# before it writes waits for the write lock instead of failing on upgrade.
+SQLITE_BEGIN_IMMEDIATE = True
+
+# Fraction of requests whose SQL is profiled: query count, DB time and
+# templates repeated at least SQL_PROFILING_REPEAT_THRESHOLD times (N+1) are
+# logged to "database.profiling" and sent as a Server-Timing header. 0 turns
+# the middleware off.
+SQL_PROFILING_SAMPLE_RATE = float(os.environ.get("SQL_PROFILING_SAMPLE_RATE", 0))
+SQL_PROFILING_REPEAT_THRESHOLD = 5
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "database.profiling": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Set CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://... in production; locmem or filebased work locally.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
     }
 }
 
@@ -138,3 +228,40 @@ LOGOUT_REDIRECT_URL = "accounts:signin"
 #     "127.0.0.1",
 #     # ...
 # ]
+
+# Authors with at least this many followers skip fan-out-on-write and are
+# merged into their followers' home timelines at read time instead.
+TIMELINE_FANOUT_THRESHOLD = 10000
+
+# Live updates pushed over server-sent events. The stream endpoint is an async
+# view and needs an ASGI server (uvicorn mysite.asgi:application).
+STREAMING_BROKER = "streaming.broker.InProcessBroker"
+STREAMING_QUEUE_SIZE = 100
+STREAMING_HEARTBEAT = 15
+
+# Seconds before each process reloads its in-memory username index, picking
+# up users and follower counts changed by other processes.
+AUTOCOMPLETE_REFRESH = 300
+
+# Metrics served at /metrics/ in the Prometheus text format. With several
+# worker processes, point METRICS_DIR at a directory they share (and empty it
+# on deploy) so the endpoint reports their sum.
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = 1
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+
+# Background tasks are rows in tasks_task run by `manage.py run_tasks`. A
+# claimed task not finished within TASKS_LEASE seconds is retried by another
+# worker; failures retry with exponential backoff up to TASKS_MAX_ATTEMPTS.
+# Finished rows, and so their idempotency keys, are kept TASKS_KEEP_DONE
+# and purged every TASKS_PURGE_INTERVAL seconds.
+TASKS_LEASE = 300
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_BACKOFF = 10
+TASKS_RETRY_BACKOFF_MAX = 3600
+TASKS_KEEP_DONE = 7 * 86400
+TASKS_PURGE_INTERVAL = 600
+
+# Likes and follows are folded into notifications in batches, at most this
+# many seconds after they happen.
+NOTIFICATIONS_DELAY = 10
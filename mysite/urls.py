@@ -20,6 +20,11 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('tweets/', include('tweets.urls')),
+    path('stream/', include('streaming.urls')),
+    path('search/', include('search.urls')),
+    path('metrics/', include('metrics.urls')),
+    path('notifications/', include('notifications.urls')),
+    path('api/', include('api.urls')),
     path('', include('welcome.urls')),
     # path('__debug__/', include('debug_toolbar.urls')),
 ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def record_last_actors(apps, schema_editor):
+    # earlier actors of existing rows are unknown; the last one at least
+    # will not be counted again
+    Notification = apps.get_model("notifications", "Notification")
+    NotificationActor = apps.get_model("notifications", "NotificationActor")
+    NotificationActor.objects.bulk_create(
+        NotificationActor(notification_id=pk, actor_id=actor_id)
+        for pk, actor_id in Notification.objects.values_list("pk", "last_actor")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationActor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="actors",
+                        to="notifications.notification",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="notificationactor",
+            constraint=models.UniqueConstraint(
+                fields=("notification", "actor"), name="notification_actor_unique"
+            ),
+        ),
+        migrations.RunPython(record_last_actors, migrations.RunPython.noop),
+    ]
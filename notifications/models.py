@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db import models
+
+from tweets.models import Tweet
+
+LIKE = "like"
+FOLLOW = "follow"
+KINDS = [(LIKE, "like"), (FOLLOW, "follow")]
+
+
+class Notification(models.Model):
+    # One row per burst: every like of a tweet (or follow of a user) that
+    # arrives while the row is unread folds into it, so a viral tweet costs
+    # its author one row, not one per like.
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="notifications", on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    tweet = models.ForeignKey(Tweet, null=True, on_delete=models.CASCADE)
+    last_actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE
+    )
+    actor_count = models.PositiveIntegerField(default=1)
+    read = models.BooleanField(default=False)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["recipient", "updated_at", "id"],
+                name="notification_inbox_idx",
+            ),
+            models.Index(fields=["recipient", "read"], name="notification_unread_idx"),
+        ]
+
+    @property
+    def others(self):
+        return self.actor_count - 1
+
+
+class NotificationActor(models.Model):
+    # Who a notification row already counts, so liking, unliking and liking
+    # again does not count the same user twice.
+    notification = models.ForeignKey(
+        Notification, related_name="actors", on_delete=models.CASCADE, db_index=False
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "actor"], name="notification_actor_unique"
+            ),
+        ]
+
+
+class NotificationEvent(models.Model):
+    # Raw likes and follows waiting for the next delivery batch. A like only
+    # knows its tweet; delivery looks up the author.
+    kind = models.CharField(max_length=10, choices=KINDS)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE
+    )
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, related_name="+", on_delete=models.CASCADE
+    )
+    tweet = models.ForeignKey(Tweet, null=True, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,120 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from accounts.models import Profile
+from tweets.models import Tweet
+
+from .models import (
+    FOLLOW,
+    LIKE,
+    Notification,
+    NotificationActor,
+    NotificationEvent,
+)
+
+BATCH_SIZE = 1000
+
+
+def _recipients(events):
+    authors = dict(
+        Tweet.objects.filter(
+            pk__in={event.tweet_id for event in events if event.kind == LIKE}
+        ).values_list("pk", "user_id")
+    )
+    for event in events:
+        recipient = (
+            event.recipient_id if event.kind == FOLLOW else authors.get(event.tweet_id)
+        )
+        # deleted tweets and self-likes notify nobody
+        if recipient is not None and recipient != event.actor_id:
+            yield recipient, event
+
+
+@transaction.atomic
+def deliver(batch_size=BATCH_SIZE):
+    # Folds a batch of events into notification rows: an event joins the
+    # unread row for the same recipient, kind and tweet, or opens a new one.
+    # Returns how many events were consumed. The batch is claimed like the
+    # task queue claims its rows, so two workers never fold the same event.
+    claimed = NotificationEvent.objects.select_for_update(skip_locked=True)
+    events = list(claimed.order_by("pk")[:batch_size])
+    if not events:
+        return 0
+    # distinct actors per burst, in order, so the last one is the newest
+    bursts = defaultdict(dict)
+    for recipient, event in _recipients(events):
+        actors = bursts[recipient, event.kind, event.tweet_id]
+        actors.pop(event.actor_id, None)
+        actors[event.actor_id] = None
+
+    # locked so mark_read cannot slip between reading and bumping a row
+    open_rows = {
+        (row.recipient_id, row.kind, row.tweet_id): row
+        for row in Notification.objects.select_for_update().filter(
+            Q(kind=FOLLOW) | Q(tweet__in={tweet_id for _, _, tweet_id in bursts}),
+            recipient__in={recipient for recipient, _, _ in bursts},
+            read=False,
+        )
+    }
+    counted = set(
+        NotificationActor.objects.filter(
+            notification__in=open_rows.values(),
+            actor__in={actor for actors in bursts.values() for actor in actors},
+        ).values_list("notification", "actor")
+    )
+    now = timezone.now()
+    created, updated, new_actors = [], [], []
+    for (recipient, kind, tweet_id), actors in bursts.items():
+        row = open_rows.get((recipient, kind, tweet_id))
+        if row is None:
+            row = Notification(
+                recipient_id=recipient,
+                kind=kind,
+                tweet_id=tweet_id,
+                actor_count=0,
+                updated_at=now,
+            )
+            created.append(row)
+        else:
+            row.updated_at = now
+            updated.append(row)
+        row.last_actor_id = list(actors)[-1]
+        for actor in actors:
+            if (row.pk, actor) not in counted:
+                row.actor_count += 1
+                new_actors.append((row, actor))
+    Notification.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    Notification.objects.bulk_update(
+        updated, ["last_actor", "actor_count", "updated_at"], batch_size=BATCH_SIZE
+    )
+    NotificationActor.objects.bulk_create(
+        (
+            NotificationActor(notification_id=row.pk, actor_id=actor)
+            for row, actor in new_actors
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    # the counter counts unread rows, so only new rows raise it; one UPDATE
+    # per distinct increment
+    opened = defaultdict(int)
+    for row in created:
+        opened[row.recipient_id] += 1
+    by_delta = defaultdict(list)
+    for recipient, delta in opened.items():
+        by_delta[delta].append(recipient)
+    for delta, recipients in by_delta.items():
+        Profile.objects.filter(user__in=recipients).update(
+            unread_notifications=F("unread_notifications") + delta
+        )
+    NotificationEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events)
+
+
+@transaction.atomic
+def mark_read(user_id):
+    Notification.objects.filter(recipient_id=user_id, read=False).update(read=True)
+    Profile.objects.filter(user_id=user_id).update(unread_notifications=0)
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from accounts.models import FriendShip
+from tasks.queue import enqueue
+from tweets.models import Like
+
+from . import tasks
+from .models import FOLLOW, LIKE, NotificationEvent
+
+
+def record(kind, actor_id, recipient_id=None, tweet_id=None):
+    if actor_id == recipient_id:
+        return
+    NotificationEvent.objects.create(
+        kind=kind, actor_id=actor_id, recipient_id=recipient_id, tweet_id=tweet_id
+    )
+    # One delivery per NOTIFICATIONS_DELAY window, due when the window has
+    # closed, so a burst lands as one batch. Events that miss it wait in the
+    # table for the next window's delivery.
+    window = int(time.time()) // settings.NOTIFICATIONS_DELAY
+    enqueue(
+        tasks.deliver,
+        key=f"deliver_notifications:{window}",
+        delay=settings.NOTIFICATIONS_DELAY,
+    )
+
+
+@receiver(post_save, sender=Like)
+def notify_like(sender, instance, created, **kwargs):
+    if created:
+        record(LIKE, instance.user_id, tweet_id=instance.tweet_id)
+
+
+@receiver(post_save, sender=FriendShip)
+def notify_follow(sender, instance, created, **kwargs):
+    if created:
+        record(FOLLOW, instance.following_id, recipient_id=instance.followed_id)
@@ -0,0 +1,9 @@
+from tasks.queue import task
+
+from . import services
+
+
+@task()
+def deliver():
+    while services.deliver():
+        pass
@@ -0,0 +1,166 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import FriendShip, Profile
+from tasks.models import Task
+from tasks.worker import run_pending
+from tweets.models import Like, Tweet
+
+from . import services
+from .models import FOLLOW, LIKE, Notification, NotificationEvent
+
+User = get_user_model()
+
+
+class NotificationTestCase(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="goodpass")
+        self.fans = [
+            User.objects.create_user(username=f"fan{i}", password="goodpass")
+            for i in range(3)
+        ]
+        self.tweet = Tweet.objects.create(user=self.author, content="hello")
+
+    def unread(self, user):
+        return Profile.objects.get(user=user).unread_notifications
+
+    def deliver(self):
+        Task.objects.update(run_after=timezone.now())
+        run_pending()
+
+
+class TestDelivery(NotificationTestCase):
+    def test_likes_collapse_into_one_row(self):
+        for fan in self.fans:
+            Like.objects.create(tweet=self.tweet, user=fan)
+        Like.objects.create(tweet=self.tweet, user=self.author)
+        # one delivery task for the whole burst
+        self.assertEqual(Task.objects.count(), 1)
+        self.deliver()
+        notification = Notification.objects.get()
+        self.assertEqual(
+            (notification.recipient, notification.kind, notification.tweet),
+            (self.author, LIKE, self.tweet),
+        )
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.last_actor, self.fans[-1])
+        self.assertEqual(self.unread(self.author), 1)
+        self.assertFalse(NotificationEvent.objects.exists())
+
+    def test_unread_row_absorbs_later_events(self):
+        Like.objects.create(tweet=self.tweet, user=self.fans[0])
+        self.deliver()
+        Like.objects.create(tweet=self.tweet, user=self.fans[1])
+        services.deliver()
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+        self.assertEqual(self.unread(self.author), 1)
+
+        services.mark_read(self.author.pk)
+        Like.objects.create(tweet=self.tweet, user=self.fans[2])
+        services.deliver()
+        self.assertEqual(
+            list(
+                Notification.objects.order_by("pk").values_list("read", "actor_count")
+            ),
+            [(True, 2), (False, 1)],
+        )
+        self.assertEqual(self.unread(self.author), 1)
+
+    def test_follows(self):
+        for fan in self.fans:
+            FriendShip.objects.create(following=fan, followed=self.author)
+        FriendShip.objects.create(following=self.author, followed=self.fans[0])
+        services.deliver()
+        self.assertEqual(
+            sorted(
+                Notification.objects.values_list("recipient", "kind", "actor_count")
+            ),
+            [(self.author.pk, FOLLOW, 3), (self.fans[0].pk, FOLLOW, 1)],
+        )
+        self.assertEqual(self.unread(self.fans[0]), 1)
+
+    def test_repeated_actor_counts_once(self):
+        for _ in range(3):
+            Like.objects.create(tweet=self.tweet, user=self.fans[0]).delete()
+        Like.objects.create(tweet=self.tweet, user=self.fans[1])
+        services.deliver()
+        # and again in a later batch, into the same unread row
+        Like.objects.create(tweet=self.tweet, user=self.fans[0])
+        for _ in range(2):
+            FriendShip.objects.create(
+                following=self.fans[2], followed=self.author
+            ).delete()
+        services.deliver()
+        self.assertEqual(
+            sorted(Notification.objects.values_list("kind", "actor_count")),
+            [(FOLLOW, 1), (LIKE, 2)],
+        )
+        like = Notification.objects.get(kind=LIKE)
+        self.assertEqual(like.last_actor, self.fans[0])
+
+    def test_batch_cost_does_not_grow_with_events(self):
+        def queries():
+            with CaptureQueriesContext(connection) as captured:
+                services.deliver()
+            return len(captured)
+
+        Like.objects.create(tweet=self.tweet, user=self.fans[0])
+        few = queries()
+        for i in range(30):
+            tweet = Tweet.objects.create(user=self.fans[i % 3], content=f"t{i}")
+            Like.objects.create(tweet=tweet, user=self.author)
+            FriendShip.objects.get_or_create(following=self.author, followed=tweet.user)
+        self.assertLessEqual(queries(), few)
+        self.assertEqual(self.unread(self.fans[0]), 11)
+
+
+class TestNotificationListView(NotificationTestCase):
+    def test_lists_and_clears_unread_on_post(self):
+        for fan in self.fans:
+            Like.objects.create(tweet=self.tweet, user=fan)
+        services.deliver()
+        self.client.force_login(self.author)
+        response = self.client.get(reverse("accounts:home"))
+        self.assertContains(response, "通知 (1)")
+
+        response = self.client.get(reverse("notifications:list"))
+        self.assertContains(response, "fan2さんと他2人が")
+        self.assertContains(response, 'class="unread"')
+        self.assertEqual(self.unread(self.author), 1)
+
+        response = self.client.post(reverse("notifications:list"))
+        self.assertRedirects(response, reverse("notifications:list"))
+        self.assertEqual(self.unread(self.author), 0)
+        self.assertFalse(Notification.objects.filter(read=False).exists())
+
+    def test_cursor_pagination(self):
+        now = timezone.now()
+        Notification.objects.bulk_create(
+            Notification(
+                recipient=self.author,
+                kind=FOLLOW,
+                last_actor=self.fans[0],
+                updated_at=now,
+            )
+            for _ in range(25)
+        )
+        self.client.force_login(self.author)
+        response = self.client.get(reverse("notifications:list"))
+        first = response.context["notifications"]
+        self.assertEqual(len(first), 20)
+        response = self.client.get(
+            reverse("notifications:list"), {"cursor": response.context["next_cursor"]}
+        )
+        self.assertEqual(len(response.context["notifications"]), 5)
+        self.assertIsNone(response.context["next_cursor"])
+        self.assertFalse(
+            {n.pk for n in first} & {n.pk for n in response.context["notifications"]}
+        )
+
+    def test_login_required(self):
+        response = self.client.get(reverse("notifications:list"))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,34 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponseRedirect
+from django.urls import reverse
+from django.views.generic import TemplateView
+
+from tweets.pagination import paginate
+
+from . import services
+from .models import Notification
+
+
+class NotificationListView(LoginRequiredMixin, TemplateView):
+    template_name = "notifications/list.html"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        cursor = self.request.GET.get("cursor")
+        notifications, next_cursor = paginate(
+            Notification.objects.filter(recipient=self.request.user).select_related(
+                "last_actor"
+            ),
+            cursor,
+            keys=("updated_at", "id"),
+        )
+        ctx["notifications"] = notifications
+        ctx["next_cursor"] = next_cursor
+        ctx["has_unread"] = any(not n.read for n in notifications)
+        return ctx
+
+    def post(self, request, *args, **kwargs):
+        # cleared by an explicit action, so a prefetch or a reload of the
+        # list does not zero the counter
+        services.mark_read(request.user.pk)
+        return HttpResponseRedirect(reverse("notifications:list"))
@@ -0,0 +1,70 @@
+import bisect
+import heapq
+from array import array
+from collections import Counter
+
+from django.db.models import Max
+
+from accounts.models import FriendShip
+
+CHUNK_SIZE = 10000
+
+
+class FollowGraph:
+    # CSR adjacency: the accounts user u follows are
+    # indices[indptr[u]:indptr[u + 1]], sorted, with user ids as row numbers.
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def load(cls):
+        last_pk = FriendShip.objects.aggregate(Max("following_id"))
+        size = (last_pk["following_id__max"] or 0) + 1
+        indptr = array("q", [0]) * (size + 1)
+        indices = array("q")
+        edges = (
+            FriendShip.objects.order_by("following_id", "followed_id")
+            .values_list("following_id", "followed_id")
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        # edges arrive grouped by follower, so the row offsets fill in order
+        row = 0
+        for following_id, followed_id in edges:
+            while row < following_id:
+                row += 1
+                indptr[row] = len(indices)
+            indices.append(followed_id)
+        while row < size:
+            row += 1
+            indptr[row] = len(indices)
+        return cls(indptr, indices)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def following(self, user_id):
+        if user_id >= len(self):
+            return self.indices[0:0]
+        return self.indices[self.indptr[user_id] : self.indptr[user_id + 1]]
+
+    def follows(self, user_id, other_id):
+        if user_id >= len(self):
+            return False
+        start, end = self.indptr[user_id], self.indptr[user_id + 1]
+        i = bisect.bisect_left(self.indices, other_id, start, end)
+        return i < end and self.indices[i] == other_id
+
+    def recommend(self, user_id, k):
+        following = self.following(user_id)
+        counts = Counter()
+        for followed_id in following:
+            candidates = self.following(followed_id)
+            counts.update(candidates)
+            if self.follows(followed_id, user_id):
+                counts.update(candidates)
+        counts.pop(user_id, None)
+        for followed_id in following:
+            counts.pop(followed_id, None)
+        return heapq.nlargest(k, counts.items(), key=lambda item: (item[1], -item[0]))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import models
+
+
+class Recommendation(models.Model):
+    # Top-K friends-of-friends for a user; score sums one per followed
+    # account that follows the candidate, two when that follow is mutual.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE
+    )
+    candidate = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE
+    )
+    score = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "candidate"], name="recommendation_unique"
+            ),
+        ]
@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import CharField, IntegerField, Value
+
+from accounts.models import FriendShip
+
+from .models import Recommendation
+
+TOP_K = 20
+SHOWN = 5
+
+
+def store(user_id, scores):
+    top = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:TOP_K]
+    Recommendation.objects.filter(user_id=user_id).delete()
+    Recommendation.objects.bulk_create(
+        Recommendation(user_id=user_id, candidate_id=candidate_id, score=score)
+        for candidate_id, score in top
+        if score > 0
+    )
+
+
+def _adjust(user_id, followed_id, sign):
+    # Only the follower's own list is updated here; how this edge changes
+    # the lists of the follower's followers waits for the next batch run.
+    scores = dict(
+        Recommendation.objects.filter(user_id=user_id).values_list(
+            "candidate_id", "score"
+        )
+    )
+    following = set(
+        FriendShip.objects.filter(following_id=user_id).values_list(
+            "followed_id", flat=True
+        )
+    )
+    candidates = list(
+        FriendShip.objects.filter(following_id=followed_id).values_list(
+            "followed_id", flat=True
+        )
+    )
+    weight = 2 if user_id in candidates else 1
+    for candidate_id in candidates:
+        if candidate_id != user_id and candidate_id not in following:
+            scores[candidate_id] = scores.get(candidate_id, 0) + sign * weight
+    scores.pop(followed_id, None)
+    store(user_id, scores)
+
+
+@transaction.atomic
+def on_follow(user_id, followed_id):
+    _adjust(user_id, followed_id, 1)
+
+
+@transaction.atomic
+def on_unfollow(user_id, followed_id):
+    _adjust(user_id, followed_id, -1)
+
+
+def following_and_suggestions_query(user_id):
+    # One query for both: HomeView already reads the followed ids, so the
+    # suggestions ride along in the same round-trip. Followed rows have a
+    # NULL score.
+    following = FriendShip.objects.filter(following_id=user_id).values_list(
+        "followed_id",
+        Value("", output_field=CharField()),
+        Value(None, output_field=IntegerField()),
+    )
+    suggestions = Recommendation.objects.filter(user_id=user_id).values_list(
+        "candidate_id", "candidate__username", "score"
+    )
+    return following.union(suggestions, all=True)
+
+
+def split_suggestions(rows):
+    following_ids = {pk for pk, _, score in rows if score is None}
+    suggestions = sorted(
+        (
+            {"username": username, "score": score}
+            for pk, username, score in rows
+            if score is not None and pk not in following_ids
+        ),
+        key=lambda suggestion: -suggestion["score"],
+    )
+    return following_ids, suggestions[:SHOWN]
+
+
+async def afollowing_and_suggestions(user_id):
+    rows = [row async for row in following_and_suggestions_query(user_id)]
+    return split_suggestions(rows)
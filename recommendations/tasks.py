@@ -0,0 +1,20 @@
+from accounts.models import FriendShip
+from tasks.queue import task
+
+from . import services
+
+# Each follow adds to the scores once and its unfollow takes it back once:
+# on_follow applies only while its friendship row exists, on_unfollow only
+# once it is gone, and unfollow() cancels an on_follow that has not run.
+
+
+@task()
+def on_follow(friendship_id, user_id, followed_id):
+    if FriendShip.objects.filter(pk=friendship_id).exists():
+        services.on_follow(user_id, followed_id)
+
+
+@task()
+def on_unfollow(friendship_id, user_id, followed_id):
+    if not FriendShip.objects.filter(pk=friendship_id).exists():
+        services.on_unfollow(user_id, followed_id)
@@ -0,0 +1,128 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import FriendShip
+from accounts.services import follow, unfollow
+from tasks.models import Task
+from tasks.worker import run_pending
+
+from .graph import FollowGraph
+from .models import Recommendation
+
+User = get_user_model()
+
+
+class RecommendationTestCase(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c, self.d, self.e = (
+            User.objects.create_user(username=name, password="goodpass")
+            for name in "abcde"
+        )
+        for following, followed in [
+            (self.a, self.b),
+            (self.b, self.a),
+            (self.b, self.c),
+            (self.a, self.d),
+            (self.d, self.c),
+            (self.d, self.e),
+        ]:
+            FriendShip.objects.create(following=following, followed=followed)
+
+    def recommendations(self, user):
+        return list(
+            Recommendation.objects.filter(user=user)
+            .order_by("-score", "candidate")
+            .values_list("candidate__username", "score")
+        )
+
+
+class TestFollowGraph(RecommendationTestCase):
+    def test_recommend_weights_mutual_follows(self):
+        graph = FollowGraph.load()
+        self.assertEqual(list(graph.following(self.a.pk)), [self.b.pk, self.d.pk])
+        self.assertTrue(graph.follows(self.b.pk, self.a.pk))
+        self.assertFalse(graph.follows(self.d.pk, self.a.pk))
+        self.assertEqual(
+            graph.recommend(self.a.pk, 10), [(self.c.pk, 3), (self.e.pk, 1)]
+        )
+        self.assertEqual(graph.recommend(self.a.pk, 1), [(self.c.pk, 3)])
+        self.assertEqual(graph.recommend(self.e.pk, 10), [])
+
+    def test_build_command(self):
+        out = StringIO()
+        call_command("build_recommendations", batch_size=2, stdout=out)
+        self.assertIn("recommended for 5 users", out.getvalue())
+        self.assertEqual(self.recommendations(self.a), [("c", 3), ("e", 1)])
+        self.assertEqual(self.recommendations(self.b), [("d", 2)])
+
+
+class TestIncrementalUpdates(RecommendationTestCase):
+    def setUp(self):
+        super().setUp()
+        call_command("build_recommendations", stdout=StringIO())
+
+    def test_follow_adds_candidates_and_drops_followed(self):
+        follow(self.a, self.c)
+        follow(self.e, self.d)
+        run_pending()
+        self.assertEqual(self.recommendations(self.a), [("e", 1)])
+        self.assertEqual(self.recommendations(self.e), [("c", 2)])
+
+    def test_unfollow_removes_contributions(self):
+        unfollow(self.a, self.d)
+        run_pending()
+        self.assertEqual(self.recommendations(self.a), [("c", 2)])
+
+    def test_unfollow_is_keyed_by_friendship(self):
+        friendship = FriendShip.objects.get(following=self.a, followed=self.d)
+        unfollow(self.a, self.d)
+        self.assertTrue(
+            Task.objects.filter(key=f"on_unfollow:{friendship.pk}").exists()
+        )
+        run_pending()
+        self.assertEqual(self.recommendations(self.a), [("c", 2)])
+
+    def test_unfollow_before_the_follow_task_runs(self):
+        follow(self.a, self.c)
+        unfollow(self.a, self.c)
+        run_pending()
+        self.assertEqual(self.recommendations(self.a), [("c", 3), ("e", 1)])
+
+    def test_refollow_before_the_unfollow_task_runs(self):
+        unfollow(self.a, self.d)
+        follow(self.a, self.d)
+        run_pending()
+        self.assertEqual(self.recommendations(self.a), [("c", 3), ("e", 1)])
+
+    def test_late_follow_task_after_unfollow(self):
+        follow(self.e, self.d)
+        friendship = FriendShip.objects.get(following=self.e, followed=self.d)
+        FriendShip.objects.filter(pk=friendship.pk).delete()
+        run_pending()
+        self.assertEqual(self.recommendations(self.e), [])
+
+
+class TestHomeSuggestions(RecommendationTestCase):
+    def test_suggestions_share_the_following_query(self):
+        self.client.force_login(self.a)
+        with CaptureQueriesContext(connection) as without:
+            response = self.client.get(reverse("accounts:home"))
+        self.assertEqual(response.context["suggestions"], [])
+
+        call_command("build_recommendations", stdout=StringIO())
+        with self.assertNumQueries(len(without)):
+            response = self.client.get(reverse("accounts:home"))
+        self.assertEqual(response.context["following_ids"], {self.b.pk, self.d.pk})
+        self.assertEqual(
+            response.context["suggestions"],
+            [{"username": "c", "score": 3}, {"username": "e", "score": 1}],
+        )
+        self.assertContains(
+            response, reverse("accounts:follow_api", kwargs={"username": "c"})
+        )
@@ -0,0 +1,181 @@
+import math
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import islice
+
+from django.core.exceptions import BadRequest
+from django.db import connection
+
+from tweets.models import Tweet
+from tweets.pagination import EPOCH, PAGE_SIZE
+
+from .models import Posting
+from .tokens import document_tokens, query_terms
+
+FTS_TABLE = "search_tweetfts"
+# Ranking adds this much per day of age to the relevance score, so a match a
+# week newer outranks one that is one bm25 point more relevant.
+RECENCY_PER_DAY = 1 / 7
+BATCH_SIZE = 1000
+
+
+def days(created_at):
+    return (created_at - EPOCH).total_seconds() / 86400
+
+
+def encode_cursor(score, pk):
+    return f"{score!r}_{pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        score, pk = cursor.rsplit("_", 1)
+        return float(score), int(pk)
+    except ValueError:
+        raise BadRequest("invalid cursor")
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return ("ENABLE_FTS5",) in cursor.fetchall()
+
+
+def get_backend():
+    return Fts5Backend() if fts5_available() else PostingsBackend()
+
+
+def rebuild(rows, batch_size=BATCH_SIZE, backend=None):
+    # rows: (pk, content, created_at) tuples; returns how many were indexed
+    backend = backend or get_backend()
+    backend.clear()
+    rows = iter(rows)
+    indexed = 0
+    while batch := list(islice(rows, batch_size)):
+        backend.index(batch)
+        indexed += len(batch)
+    return indexed
+
+
+def _page(rows, page_size):
+    # rows are (pk, score) best first; scores move slightly as the corpus
+    # grows, which can repeat or skip a result at a page boundary
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return [pk for pk, _ in rows], next_cursor
+
+
+class Fts5Backend:
+    # Tokens are stored pre-split and space separated; the table, created by
+    # search migration 0002, uses the ascii tokenizer, which only splits on
+    # ASCII punctuation and whitespace, so bigrams survive.
+
+    def index(self, rows):
+        rows = [
+            (pk, " ".join(document_tokens(content)), days(created_at))
+            for pk, content, created_at in rows
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, tokens, created) VALUES (%s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in pks]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, query, cursor=None, page_size=PAGE_SIZE):
+        terms = query_terms(query)
+        if not terms:
+            return [], None
+        match = " AND ".join(
+            f'"{token}"*' if prefix else f'"{token}"' for token, prefix in terms
+        )
+        sql = (
+            "SELECT tweet_id, score FROM ("
+            f"SELECT rowid AS tweet_id, created * %s - bm25({FTS_TABLE}) AS score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)"
+        )
+        params = [RECENCY_PER_DAY, match]
+        if cursor:
+            score, pk = decode_cursor(cursor)
+            sql += " WHERE score < %s OR (score = %s AND tweet_id < %s)"
+            params += [score, score, pk]
+        sql += " ORDER BY score DESC, tweet_id DESC LIMIT %s"
+        params.append(page_size + 1)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            return _page(db_cursor.fetchall(), page_size)
+
+
+class PostingsBackend:
+    # Ranks in Python with tf-idf over the Posting table; slower than FTS5
+    # on common terms but works on any database.
+
+    def index(self, rows):
+        rows = list(rows)
+        self.remove([pk for pk, _, _ in rows])
+        Posting.objects.bulk_create(
+            (
+                Posting(token=token, tweet_id=pk, count=count)
+                for pk, content, _ in rows
+                for token, count in Counter(document_tokens(content)).items()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+    def remove(self, pks):
+        Posting.objects.filter(tweet_id__in=pks).delete()
+
+    def clear(self):
+        Posting.objects.all().delete()
+
+    def search(self, query, cursor=None, page_size=PAGE_SIZE):
+        terms = query_terms(query)
+        if not terms:
+            return [], None
+        total = Tweet.objects.count()
+        scores = None
+        created = {}
+        for token, prefix in terms:
+            postings = Posting.objects.filter(
+                **{"token__startswith" if prefix else "token": token}
+            ).values_list("tweet_id", "count", "tweet__created_at")
+            counts = defaultdict(int)
+            for pk, count, created_at in postings.iterator(chunk_size=BATCH_SIZE):
+                counts[pk] += count
+                created[pk] = created_at
+            idf = math.log(1 + total / max(len(counts), 1))
+            if scores is None:
+                scores = {pk: count * idf for pk, count in counts.items()}
+            else:
+                scores = {
+                    pk: score + counts[pk] * idf
+                    for pk, score in scores.items()
+                    if pk in counts
+                }
+
+        rows = [
+            (pk, score + days(created[pk]) * RECENCY_PER_DAY)
+            for pk, score in scores.items()
+        ]
+        if cursor:
+            after = decode_cursor(cursor)
+            rows = [row for row in rows if (row[1], row[0]) < after]
+        rows.sort(key=lambda row: (row[1], row[0]), reverse=True)
+        return _page(rows[: page_size + 1], page_size)
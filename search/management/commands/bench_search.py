@@ -0,0 +1,134 @@
+import itertools
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from benchmarks.seed import explicit_created_at, zipf_weights
+from search.backends import (
+    BATCH_SIZE,
+    Fts5Backend,
+    PostingsBackend,
+    fts5_available,
+    rebuild,
+)
+from tweets.models import Tweet
+
+User = get_user_model()
+
+# hiragana, katakana and a slice of common kanji
+ALPHABET = (
+    [chr(c) for c in range(0x3042, 0x3094)]
+    + [chr(c) for c in range(0x30A2, 0x30F4)]
+    + [chr(c) for c in range(0x4E00, 0x4E00 + 2000)]
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Index a synthetic Japanese corpus on a throwaway test database and "
+        "report build time and query latency for common, mid-frequency, rare "
+        "and one-character queries, against a LIKE table scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tweets", type=int, default=1000000)
+        parser.add_argument("--vocabulary", type=int, default=50000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--backend", choices=["fts5", "postings"], default=None)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        backend = options["backend"] or ("fts5" if fts5_available() else "postings")
+        backend_class = {"fts5": Fts5Backend, "postings": PostingsBackend}[backend]
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            words = self.seed(rng, options["tweets"], options["vocabulary"])
+            start = time.perf_counter()
+            rows = Tweet.objects.values_list("pk", "content", "created_at")
+            rebuild(rows.iterator(chunk_size=BATCH_SIZE), backend=backend_class())
+            build = time.perf_counter() - start
+            self.stdout.write(
+                f"{backend}: indexed {options['tweets']} tweets in {build:.1f}s"
+            )
+
+            vocabulary = len(words)
+            queries = {
+                "common": words[:10],
+                "mid": words[vocabulary // 100 : vocabulary // 100 + 10],
+                "rare": words[-10:],
+                "one char": [word[0] for word in words[:10]],
+            }
+            self.stdout.write(
+                f"{'query':<10}{'index p50 ms':>14}{'index p99 ms':>14}"
+                f"{'scan p50 ms':>13}"
+            )
+            for name, terms in queries.items():
+                indexed = self.measure(
+                    lambda term: backend_class().search(term),
+                    rng,
+                    terms,
+                    options["queries"],
+                )
+                scan = self.measure(
+                    lambda term: list(
+                        Tweet.objects.filter(content__contains=term)
+                        .order_by("-created_at")
+                        .values_list("pk", flat=True)[:20]
+                    ),
+                    rng,
+                    terms,
+                    min(options["queries"], 5),
+                )
+                self.stdout.write(
+                    f"{name:<10}{indexed[0]:>14.2f}{indexed[1]:>14.2f}{scan[0]:>13.2f}"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, rng, tweets, vocabulary):
+        words = [
+            "".join(rng.choices(ALPHABET, k=rng.randint(2, 4)))
+            for _ in range(vocabulary)
+        ]
+        cum_weights = list(itertools.accumulate(zipf_weights(vocabulary, 1.0)))
+        user = User.objects.create(username="bench", password="!")
+        now = timezone.now()
+        with explicit_created_at(Tweet):
+            for offset in range(0, tweets, BATCH_SIZE * 10):
+                Tweet.objects.bulk_create(
+                    (
+                        Tweet(
+                            user=user,
+                            content=self.sentence(rng, words, cum_weights),
+                            created_at=now
+                            - timedelta(seconds=rng.randrange(86400 * 365)),
+                        )
+                        for _ in range(min(BATCH_SIZE * 10, tweets - offset))
+                    ),
+                    batch_size=BATCH_SIZE,
+                )
+        return words
+
+    def sentence(self, rng, words, cum_weights):
+        words = rng.choices(words, cum_weights=cum_weights, k=rng.randint(5, 15))
+        return "".join(words)[:140]
+
+    def measure(self, search, rng, terms, iterations):
+        timings = []
+        for _ in range(iterations):
+            term = rng.choice(terms)
+            start = time.perf_counter()
+            search(term)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return (
+            statistics.median(timings),
+            timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.backends import BATCH_SIZE, rebuild
+from tweets.models import Tweet
+
+
+class Command(BaseCommand):
+    help = "Rebuild the tweet search index from scratch, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rows = Tweet.objects.values_list("pk", "content", "created_at").iterator(
+            chunk_size=options["batch_size"]
+        )
+        indexed = rebuild(rows, options["batch_size"])
+        self.stdout.write(f"indexed {indexed} tweets")
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("tweets", "0004_like_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Posting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=2)),
+                ("count", models.PositiveSmallIntegerField()),
+                (
+                    "tweet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="tweets.tweet"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="posting",
+            constraint=models.UniqueConstraint(
+                fields=("token", "tweet"), name="posting_unique"
+            ),
+        ),
+    ]
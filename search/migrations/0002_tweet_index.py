@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:45
+
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import islice
+
+from django.db import migrations
+
+# Frozen copies of the index layout and tokenizer as of this migration, so
+# later changes to search.backends or search.tokens cannot break it.
+FTS_TABLE = "search_tweetfts"
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "tokens, created UNINDEXED, tokenize='ascii', detail='column')"
+)
+INSERT_SQL = f"INSERT INTO {FTS_TABLE}(rowid, tokens, created) VALUES (%s, %s, %s)"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+RUN = re.compile(r"[^\W_]+")
+BATCH_SIZE = 1000
+
+
+def document_tokens(text):
+    tokens = []
+    for run in RUN.findall(unicodedata.normalize("NFKC", text).lower()):
+        tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return tokens
+
+
+def fts5_available(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return ("ENABLE_FTS5",) in cursor.fetchall()
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Tweet = apps.get_model("tweets", "Tweet")
+    rows = (
+        Tweet.objects.using(connection.alias)
+        .values_list("pk", "content", "created_at")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    if fts5_available(connection):
+        schema_editor.execute(CREATE_SQL)
+        with connection.cursor() as cursor:
+            while batch := list(islice(rows, BATCH_SIZE)):
+                cursor.executemany(
+                    INSERT_SQL,
+                    [
+                        (
+                            pk,
+                            " ".join(document_tokens(content)),
+                            (created_at - EPOCH).total_seconds() / 86400,
+                        )
+                        for pk, content, created_at in batch
+                    ],
+                )
+        return
+    Posting = apps.get_model("search", "Posting")
+    while batch := list(islice(rows, BATCH_SIZE)):
+        Posting.objects.using(connection.alias).bulk_create(
+            Posting(token=token, tweet_id=pk, count=count)
+            for pk, content, _ in batch
+            for token, count in Counter(document_tokens(content)).items()
+        )
+
+
+def drop_index(apps, schema_editor):
+    if fts5_available(schema_editor.connection):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db import models
+
+from tweets.models import Tweet
+
+
+class Posting(models.Model):
+    # Inverted index for databases without FTS5: one row per distinct token
+    # of a tweet.
+    token = models.CharField(max_length=2)
+    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE)
+    count = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["token", "tweet"], name="posting_unique"),
+        ]
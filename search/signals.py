@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tweets.models import Tweet
+
+from .backends import get_backend
+
+
+@receiver(post_save, sender=Tweet)
+def index_tweet(sender, instance, **kwargs):
+    get_backend().index([(instance.pk, instance.content, instance.created_at)])
+
+
+@receiver(post_delete, sender=Tweet)
+def unindex_tweet(sender, instance, **kwargs):
+    get_backend().remove([instance.pk])
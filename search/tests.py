@@ -0,0 +1,154 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from tweets.models import Tweet
+
+from .backends import Fts5Backend, PostingsBackend, fts5_available, get_backend
+from .models import Posting
+from .tokens import document_tokens, query_terms
+
+User = get_user_model()
+
+
+class TestTokens(TestCase):
+    def test_document_bigrams(self):
+        self.assertEqual(
+            document_tokens("東京タワー、ＡＢ"),
+            ["東京", "京タ", "タワ", "ワー", "ー", "ab", "b"],
+        )
+
+    def test_query_terms(self):
+        self.assertEqual(query_terms("東京 猫"), [("東京", False), ("猫", True)])
+        self.assertEqual(query_terms("!!"), [])
+
+
+class BackendTests:
+    backend_class = None
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.backend = self.backend_class()
+        self.backend.clear()
+
+    def tweet(self, content, days_ago=0):
+        tweet = Tweet.objects.create(user=self.user, content=content)
+        tweet.created_at -= timedelta(days=days_ago)
+        Tweet.objects.filter(pk=tweet.pk).update(created_at=tweet.created_at)
+        self.backend.index([(tweet.pk, tweet.content, tweet.created_at)])
+        return tweet
+
+    def test_matches_all_terms(self):
+        tokyo_tower = self.tweet("東京タワーに行った")
+        self.tweet("京都タワーに行った")
+        self.tweet("東京駅に行った")
+        self.assertEqual(self.backend.search("東京タワー")[0], [tokyo_tower.pk])
+
+    def test_single_character_query(self):
+        cat = self.tweet("黒猫がいる")
+        self.tweet("犬がいる")
+        self.assertEqual(self.backend.search("猫")[0], [cat.pk])
+
+    def test_recent_tweets_rank_higher(self):
+        old = self.tweet("ラーメン食べた", days_ago=30)
+        new = self.tweet("ラーメン食べた")
+        self.assertEqual(self.backend.search("ラーメン")[0], [new.pk, old.pk])
+
+    def test_cursor_pagination(self):
+        tweets = [self.tweet(f"ラーメン{i}", days_ago=i) for i in range(5)]
+        pks, cursor = self.backend.search("ラーメン", page_size=2)
+        pages = [pks]
+        while cursor:
+            pks, cursor = self.backend.search("ラーメン", cursor, page_size=2)
+            pages.append(pks)
+        self.assertEqual(pages, [[t.pk for t in tweets[i : i + 2]] for i in (0, 2, 4)])
+
+    def test_remove(self):
+        tweet = self.tweet("ラーメン食べた")
+        self.backend.remove([tweet.pk])
+        self.assertEqual(self.backend.search("ラーメン")[0], [])
+
+
+class TestPostingsBackend(BackendTests, TestCase):
+    backend_class = PostingsBackend
+
+    def test_postings_count_repeated_tokens(self):
+        tweet = self.tweet("ははは")
+        self.assertEqual(
+            dict(Posting.objects.filter(tweet=tweet).values_list("token", "count")),
+            {"はは": 2, "は": 1},
+        )
+
+
+if fts5_available():
+
+    class TestFts5Backend(BackendTests, TestCase):
+        backend_class = Fts5Backend
+
+
+class TestIndexMaintenance(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+
+    def test_save_and_delete_update_index(self):
+        tweet = Tweet.objects.create(user=self.user, content="ラーメン食べた")
+        self.assertEqual(get_backend().search("ラーメン")[0], [tweet.pk])
+        tweet.content = "うどん食べた"
+        tweet.save()
+        self.assertEqual(get_backend().search("ラーメン")[0], [])
+        self.assertEqual(get_backend().search("うどん")[0], [tweet.pk])
+        tweet.delete()
+        self.assertEqual(get_backend().search("うどん")[0], [])
+
+    def test_rebuild_command(self):
+        tweets = Tweet.objects.bulk_create(
+            Tweet(user=self.user, content=f"ラーメン{i}") for i in range(3)
+        )
+        out = StringIO()
+        call_command("rebuild_search_index", batch_size=2, stdout=out)
+        self.assertIn("indexed 3 tweets", out.getvalue())
+        self.assertEqual(
+            set(get_backend().search("ラーメン")[0]), {tweet.pk for tweet in tweets}
+        )
+
+
+class TestSearchView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.tweets = [
+            Tweet.objects.create(user=self.user, content=f"ラーメン{i}")
+            for i in range(25)
+        ]
+
+    def test_success_get(self):
+        response = self.client.get(reverse("search:search"), {"q": "ラーメン"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "search/search.html")
+        self.assertEqual(len(response.context["tweets"]), 20)
+        response = self.client.get(
+            reverse("search:search"),
+            {"q": "ラーメン", "cursor": response.context["next_cursor"]},
+        )
+        self.assertEqual(len(response.context["tweets"]), 5)
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_success_get_without_query(self):
+        response = self.client.get(reverse("search:search"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["tweets"], [])
+
+    def test_failure_get_with_invalid_cursor(self):
+        response = self.client.get(
+            reverse("search:search"), {"q": "ラーメン", "cursor": "invalid"}
+        )
+        self.assertEqual(response.status_code, 400)
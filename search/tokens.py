@@ -0,0 +1,30 @@
+import re
+import unicodedata
+
+# Japanese has no spaces between words, so text is indexed as overlapping
+# character bigrams. Each run also ends with its last character on its own,
+# which lets a one-character query match as a prefix of some token.
+RUN = re.compile(r"[^\W_]+")
+
+
+def _runs(text):
+    return RUN.findall(unicodedata.normalize("NFKC", text).lower())
+
+
+def document_tokens(text):
+    tokens = []
+    for run in _runs(text):
+        tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return tokens
+
+
+def query_terms(text):
+    # (token, is_prefix) pairs, all of which must match
+    terms = {}
+    for run in _runs(text):
+        if len(run) == 1:
+            terms.setdefault(run, True)
+        for i in range(len(run) - 1):
+            terms[run[i : i + 2]] = False
+    return list(terms.items())
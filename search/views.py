@@ -0,0 +1,27 @@
+from django.views.generic import TemplateView
+
+from accounts.views import get_liked_ids
+from tweets.fragments import attach_rows
+from tweets.models import Tweet
+
+from .backends import get_backend
+
+MAX_QUERY_LENGTH = 100
+
+
+class SearchView(TemplateView):
+    template_name = "search/search.html"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()[:MAX_QUERY_LENGTH]
+        pks, next_cursor = get_backend().search(query, self.request.GET.get("cursor"))
+        tweets = Tweet.objects.select_related("user").in_bulk(pks)
+        tweets = [tweets[pk] for pk in pks if pk in tweets]
+        ctx["q"] = query
+        ctx["tweets"] = attach_rows(tweets)
+        ctx["next_cursor"] = next_cursor
+        ctx["liked_ids"] = set()
+        if self.request.user.is_authenticated:
+            ctx["liked_ids"] = get_liked_ids(self.request.user, tweets)
+        return ctx
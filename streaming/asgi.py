@@ -0,0 +1,41 @@
+import asyncio
+
+
+class DisconnectMiddleware:
+    # Django stops reading from the client once the request body is in, so a
+    # closed event stream would only be noticed on a failing write, which some
+    # servers never report. Watch for http.disconnect on the streaming paths
+    # and cancel the request so its subscription is released.
+
+    def __init__(self, app, prefix):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+
+        body_received = asyncio.Event()
+
+        async def receive_body():
+            message = await receive()
+            if not message.get("more_body"):
+                body_received.set()
+            return message
+
+        async def wait_for_disconnect():
+            await body_received.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        app = asyncio.ensure_future(self.app(scope, receive_body, send))
+        watcher = asyncio.ensure_future(wait_for_disconnect())
+        try:
+            await asyncio.wait({app, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (app, watcher):
+                task.cancel()
+        try:
+            await app
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Broker:
+    # Interface for STREAMING_BROKER. publish() is called from sync views,
+    # subscribe() from the event loop serving the connection.
+
+    def subscribe(self, channels, maxsize=None):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, channel, event, data):
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:  # the connection's loop is gone
+            self.close()
+
+    def _put(self, message):
+        # A full queue means the client is not keeping up. Drop instead of
+        # buffering without bound and tell the client on its next read.
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def get(self, timeout):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return "overflow", {"dropped": dropped}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(Broker):
+    # Only reaches connections served by this process; run one ASGI worker
+    # per node or plug in a shared broker to fan out across workers.
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels, maxsize=None):
+        if maxsize is None:
+            maxsize = settings.STREAMING_QUEUE_SIZE
+        subscription = Subscription(self, channels, maxsize)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.push((event, data))
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.STREAMING_BROKER)()
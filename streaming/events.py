@@ -0,0 +1,29 @@
+from django.db import transaction
+
+from .broker import get_broker
+
+
+def author_channel(user_id):
+    return f"author:{user_id}"
+
+
+def tweet_channel(tweet_id):
+    return f"tweet:{tweet_id}"
+
+
+def publish_tweet(tweet):
+    data = {
+        "id": tweet.pk,
+        "user": tweet.user.username,
+        "content": tweet.content,
+        "created_at": tweet.created_at.isoformat(),
+    }
+    transaction.on_commit(
+        lambda: get_broker().publish(author_channel(tweet.user_id), "tweet", data)
+    )
+
+
+def publish_like_count(tweet_id, count):
+    # called by the like views once their transaction has committed
+    data = {"tweet_id": tweet_id, "count": count}
+    get_broker().publish(tweet_channel(tweet_id), "like", data)
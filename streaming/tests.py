@@ -0,0 +1,146 @@
+import asyncio
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import FriendShip
+from tweets.models import Tweet
+
+from .asgi import DisconnectMiddleware
+from .broker import InProcessBroker, get_broker
+from .events import author_channel, tweet_channel
+
+User = get_user_model()
+
+
+class TestInProcessBroker(TestCase):
+    async def test_publish_reaches_subscribed_channels_only(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(["a"], maxsize=10)
+        broker.publish("b", "tweet", {"id": 1})
+        broker.publish("a", "tweet", {"id": 2})
+        self.assertEqual(await subscription.get(1), ("tweet", {"id": 2}))
+        self.assertIsNone(await subscription.get(0.01))
+
+    async def test_slow_subscriber_drops_and_gets_overflow(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(["a"], maxsize=1)
+        for i in range(3):
+            broker.publish("a", "like", {"count": i})
+        await asyncio.sleep(0)
+        self.assertEqual(await subscription.get(1), ("overflow", {"dropped": 2}))
+        self.assertEqual(await subscription.get(1), ("like", {"count": 0}))
+
+    async def test_close_unsubscribes(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(["a", "b"], maxsize=10)
+        subscription.close()
+        self.assertEqual(broker._subscribers, {})
+
+
+@override_settings(STREAMING_HEARTBEAT=0.01)
+class TestStreamView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.user2 = User.objects.create_user(
+            username="test2", email="test2@test.com", password="goodpass"
+        )
+        FriendShip.objects.create(following=self.user, followed=self.user2)
+        self.tweet = Tweet.objects.create(user=self.user2, content="hello")
+
+    async def test_anonymous_is_forbidden(self):
+        response = await self.async_client.get(reverse("streaming:stream"))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_stream_pushes_followed_tweets_and_like_counts(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(
+            reverse("streaming:stream"), {"tweets": f"{self.tweet.pk}"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        self.assertEqual(await anext(stream), b": ping\n\n")
+
+        broker = get_broker()
+        broker.publish(author_channel(self.user2.pk), "tweet", {"id": 1})
+        broker.publish(tweet_channel(self.tweet.pk), "like", {"count": 3})
+        self.assertEqual(await anext(stream), b'event: tweet\ndata: {"id": 1}\n\n')
+        self.assertEqual(await anext(stream), b'event: like\ndata: {"count": 3}\n\n')
+        await stream.aclose()
+
+
+class TestDisconnectMiddleware(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.client.force_login(self.user)
+
+    async def test_client_disconnect_releases_subscription(self):
+        application = DisconnectMiddleware(ASGIHandler(), prefix="/stream/")
+        cookie = f"sessionid={self.client.cookies['sessionid'].value}"
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": reverse("streaming:stream"),
+            "query_string": b"",
+            "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+        }
+        inbox = asyncio.Queue()
+        await inbox.put({"type": "http.request", "body": b""})
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        request = asyncio.ensure_future(application(scope, inbox.get, send))
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertIn(author_channel(self.user.pk), get_broker()._subscribers)
+
+        await inbox.put({"type": "http.disconnect"})
+        await asyncio.wait_for(request, 5)
+        self.assertNotIn(author_channel(self.user.pk), get_broker()._subscribers)
+
+
+class TestPublishHooks(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.client.force_login(self.user)
+        self.tweet = Tweet.objects.create(user=self.user, content="hello")
+
+    def published(self, channel, action):
+        with patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        return [
+            call.args[1:] for call in publish.call_args_list if call.args[0] == channel
+        ]
+
+    def test_tweet_create_publishes_to_author_channel(self):
+        messages = self.published(
+            author_channel(self.user.pk),
+            lambda: self.client.post(reverse("tweets:create"), {"content": "new"}),
+        )
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0][0], "tweet")
+        self.assertEqual(messages[0][1]["content"], "new")
+
+    def test_like_publishes_count(self):
+        messages = self.published(
+            tweet_channel(self.tweet.pk),
+            lambda: self.client.post(
+                reverse("tweets:like", kwargs={"pk": self.tweet.pk})
+            ),
+        )
+        self.assertEqual(messages, [("like", {"tweet_id": self.tweet.pk, "count": 1})])
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import views
+
+app_name = "streaming"
+urlpatterns = [
+    path("", views.stream_view, name="stream"),
+]
@@ -0,0 +1,49 @@
+import json
+
+from django.conf import settings
+from django.http import HttpResponseForbidden, StreamingHttpResponse
+
+from accounts.decorators import aget_user
+from accounts.models import FriendShip
+
+from .broker import get_broker
+from .events import author_channel, tweet_channel
+
+MAX_TWEETS = 100
+
+
+async def _event_stream(subscription):
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            message = await subscription.get(settings.STREAMING_HEARTBEAT)
+            if message is None:
+                # keeps idle connections open through proxies
+                yield ": ping\n\n"
+                continue
+            event, data = message
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    finally:
+        subscription.close()
+
+
+async def stream_view(request):
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+
+    channels = [author_channel(user.pk)]
+    followed_ids = FriendShip.objects.filter(following_id=user.pk).values_list(
+        "followed_id", flat=True
+    )
+    channels += [author_channel(pk) async for pk in followed_ids]
+    tweet_ids = request.GET.get("tweets", "").split(",")[:MAX_TWEETS]
+    channels += [tweet_channel(pk) for pk in tweet_ids if pk.isdigit()]
+
+    subscription = get_broker().subscribe(channels)
+    response = StreamingHttpResponse(
+        _event_stream(subscription), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
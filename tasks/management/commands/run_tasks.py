@@ -0,0 +1,48 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.worker import purge, run_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background tasks (timeline fan-out, recommendation "
+        "updates, notification delivery). Start one or more next to the web "
+        "workers; --once drains the queue and exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--poll", type=float, default=1.0)
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        keep_done = timedelta(seconds=settings.TASKS_KEEP_DONE)
+        next_purge = time.monotonic()
+        while not self.stopping:
+            # a long-lived worker gets the same CONN_MAX_AGE and health
+            # checks as a request, so a dropped connection is replaced
+            close_old_connections()
+            if time.monotonic() >= next_purge:
+                # drop finished tasks past the idempotency window, busy or not
+                purge(keep_done)
+                next_purge = time.monotonic() + settings.TASKS_PURGE_INTERVAL
+            done, failed = run_batch(options["batch_size"])
+            if done or failed:
+                self.stdout.write(f"ran {done} tasks, {failed} failed")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["poll"])
+
+    def stop(self, signum, frame):
+        # finish the current batch, then exit
+        self.stopping = True
@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS = [(s, s) for s in (PENDING, RUNNING, DONE, FAILED)]
+
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    # Enqueueing a key that already exists is a no-op, so a side effect
+    # requested twice (a retried request, a replayed event) runs once.
+    key = models.CharField(max_length=200, null=True, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    # a running task whose lease ran out belongs to a dead worker
+    locked_until = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"], name="task_status_run_after_idx"
+            ),
+        ]
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Task
+
+TASKS = {}
+
+
+def task(max_attempts=None):
+    def register(func):
+        func.task_name = f"{func.__module__}.{func.__name__}"
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+
+    return register
+
+
+def _build(func, key, delay, payload):
+    return Task(
+        name=func.task_name,
+        payload=payload,
+        key=key,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+# The row is written in the caller's transaction, so a task exists exactly
+# when the change that asked for it committed.
+
+
+def enqueue(func, key=None, delay=0, **payload):
+    Task.objects.bulk_create([_build(func, key, delay, payload)], ignore_conflicts=True)
+
+
+async def aenqueue(func, key=None, delay=0, **payload):
+    await Task.objects.abulk_create(
+        [_build(func, key, delay, payload)], ignore_conflicts=True
+    )
+
+
+def cancel(key):
+    # True if the task had not started, so it never will
+    deleted, _ = Task.objects.filter(key=key, status=Task.PENDING).delete()
+    return bool(deleted)
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tweets.models import Tweet
+
+from .models import Task
+from .queue import enqueue, task
+from .worker import run_pending
+
+User = get_user_model()
+
+calls = []
+
+
+@task()
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def flaky(value):
+    calls.append(value)
+    raise ValueError(value)
+
+
+@task()
+def write_then_fail(tweet_id):
+    Tweet.objects.filter(pk=tweet_id).update(like_count=1)
+    raise ValueError(tweet_id)
+
+
+class TestQueue(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_and_marks_done(self):
+        enqueue(record, value=1)
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(calls, [1])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertEqual(run_pending(), (0, 0))
+
+    def test_idempotency_key(self):
+        enqueue(record, key="once", value=1)
+        enqueue(record, key="once", value=2)
+        run_pending()
+        enqueue(record, key="once", value=3)
+        run_pending()
+        self.assertEqual(calls, [1])
+
+    def test_delay(self):
+        enqueue(record, delay=60, value=1)
+        self.assertEqual(run_pending(), (0, 0))
+        Task.objects.update(run_after=timezone.now())
+        self.assertEqual(run_pending(), (1, 0))
+
+    @override_settings(TASKS_RETRY_BACKOFF=10)
+    def test_retries_with_backoff_then_fails(self):
+        enqueue(flaky, value=1)
+        with self.assertLogs("tasks.worker", "ERROR"):
+            self.assertEqual(run_pending(), (0, 1))
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.PENDING, 1))
+        self.assertGreater(task.run_after, timezone.now() + timedelta(seconds=4))
+        self.assertIn("ValueError", task.last_error)
+
+        Task.objects.update(run_after=timezone.now())
+        with self.assertLogs("tasks.worker", "ERROR"):
+            self.assertEqual(run_pending(), (0, 1))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+        self.assertEqual(calls, [1, 1])
+
+    def test_failed_work_is_rolled_back(self):
+        user = User.objects.create_user(username="test", password="goodpass")
+        tweet = Tweet.objects.create(user=user, content="hello")
+        enqueue(write_then_fail, tweet_id=tweet.pk)
+        Task.objects.create(name="tasks.tests.missing")
+        with self.assertLogs("tasks.worker", "ERROR"):
+            self.assertEqual(run_pending(), (0, 2))
+        tweet.refresh_from_db()
+        self.assertEqual(tweet.like_count, 0)
+        self.assertEqual(
+            Task.objects.get(name="tasks.tests.missing").status, Task.FAILED
+        )
+
+    def test_expired_lease_is_reclaimed(self):
+        enqueue(record, value=1)
+        Task.objects.update(
+            status=Task.RUNNING, locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(run_pending(), (1, 0))
+        enqueue(record, value=2)
+        Task.objects.filter(status=Task.PENDING).update(
+            status=Task.RUNNING, locked_until=timezone.now() + timedelta(seconds=60)
+        )
+        self.assertEqual(run_pending(), (0, 0))
+
+    def test_run_tasks_command(self):
+        enqueue(record, value=1)
+        out = StringIO()
+        call_command("run_tasks", once=True, stdout=out)
+        self.assertEqual(calls, [1])
+        self.assertIn("ran 1 tasks, 0 failed", out.getvalue())
+
+    @override_settings(TASKS_KEEP_DONE=60)
+    def test_run_tasks_purges_and_refreshes_connections(self):
+        enqueue(record, key="old", value=1)
+        run_pending()
+        Task.objects.update(created_at=timezone.now() - timedelta(seconds=120))
+        enqueue(record, value=2)
+        with mock.patch(
+            "tasks.management.commands.run_tasks.close_old_connections"
+        ) as close_old_connections:
+            call_command("run_tasks", once=True, stdout=StringIO())
+        close_old_connections.assert_called()
+        self.assertFalse(Task.objects.filter(key="old").exists())
+        self.assertEqual(calls, [1, 2])
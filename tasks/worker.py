@@ -0,0 +1,99 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+from .queue import TASKS
+
+logger = logging.getLogger(__name__)
+
+
+def claim(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Task.PENDING, run_after__lte=now)
+                | Q(status=Task.RUNNING, locked_until__lt=now)
+            )
+            .order_by("run_after")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        Task.objects.filter(pk__in=ids).update(
+            status=Task.RUNNING,
+            attempts=F("attempts") + 1,
+            locked_until=now + timedelta(seconds=settings.TASKS_LEASE),
+        )
+    return list(Task.objects.filter(pk__in=ids).order_by("run_after"))
+
+
+def backoff(attempts):
+    delay = min(
+        settings.TASKS_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.TASKS_RETRY_BACKOFF_MAX,
+    )
+    # jitter so tasks that failed together do not retry together
+    return random.uniform(delay / 2, delay)
+
+
+def execute(task):
+    func = TASKS.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f"unknown task {task.name}")
+        # the side effect and the done mark commit together
+        with transaction.atomic():
+            func(**task.payload)
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.DONE, locked_until=None, last_error=""
+            )
+        return True
+    except Exception:
+        max_attempts = (
+            getattr(func, "max_attempts", None) or settings.TASKS_MAX_ATTEMPTS
+        )
+        failed = func is None or task.attempts >= max_attempts
+        logger.exception(
+            "task %s %s failed (attempt %s)", task.pk, task.name, task.attempts
+        )
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.FAILED if failed else Task.PENDING,
+            run_after=timezone.now() + timedelta(seconds=backoff(task.attempts)),
+            locked_until=None,
+            last_error=traceback.format_exc(),
+        )
+        return False
+
+
+def run_batch(batch_size=100):
+    done = failed = 0
+    for task in claim(batch_size):
+        if execute(task):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def run_pending(batch_size=100):
+    # Runs batches until nothing is due; returns (done, failed runs).
+    done = failed = 0
+    while True:
+        batch_done, batch_failed = run_batch(batch_size)
+        if not batch_done and not batch_failed:
+            return done, failed
+        done += batch_done
+        failed += batch_failed
+
+
+def purge(older_than):
+    return Task.objects.filter(
+        status=Task.DONE, created_at__lt=timezone.now() - older_than
+    ).delete()[0]
@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from accounts.models import FriendShip, Profile
+from timelines.models import HighFanoutAuthor, TimelineEntry
+from timelines.services import fan_out, home_timeline
+from tweets.models import Tweet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare fan-out-on-write and fan-out-on-read on a throwaway test "
+        "database: inbox rows written per tweet and home timeline read latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--followers", type=int, default=5000)
+        parser.add_argument("--tweets", type=int, default=50)
+        parser.add_argument("--reads", type=int, default=200)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            self.seed(options["followers"])
+            self.stdout.write(
+                f"{'mode':<8}{'rows/tweet':>12}{'write ms':>10}"
+                f"{'read p50 ms':>13}{'read p99 ms':>13}"
+            )
+            # one threshold above the author's follower count, one below it
+            for mode, threshold in (
+                ("write", options["followers"] + 1),
+                ("read", options["followers"]),
+            ):
+                with override_settings(TIMELINE_FANOUT_THRESHOLD=threshold):
+                    self.run(mode, options["tweets"], options["reads"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, followers):
+        User.objects.bulk_create(
+            User(username=f"bench{i}", password="!") for i in range(followers + 1)
+        )
+        self.author, *rest = User.objects.order_by("pk")
+        self.reader = rest[0]
+        Profile.objects.create(user=self.author, followers_count=followers)
+        FriendShip.objects.bulk_create(
+            (FriendShip(following=user, followed=self.author) for user in rest),
+            batch_size=1000,
+        )
+
+    def run(self, mode, tweets, reads):
+        TimelineEntry.objects.all().delete()
+        HighFanoutAuthor.objects.all().delete()
+        Tweet.objects.all().delete()
+
+        write_times = []
+        for i in range(tweets):
+            start = time.perf_counter()
+            fan_out(Tweet.objects.create(user=self.author, content=f"tweet{i}"))
+            write_times.append(time.perf_counter() - start)
+        rows_per_tweet = TimelineEntry.objects.count() / tweets
+
+        read_times = []
+        for _ in range(reads):
+            start = time.perf_counter()
+            home_timeline(self.reader)
+            read_times.append(time.perf_counter() - start)
+        read_times.sort()
+
+        self.stdout.write(
+            f"{mode:<8}{rows_per_tweet:>12.1f}"
+            f"{statistics.mean(write_times) * 1000:>10.2f}"
+            f"{read_times[len(read_times) // 2] * 1000:>13.2f}"
+            f"{read_times[int(len(read_times) * 0.99)] * 1000:>13.2f}"
+        )
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from timelines.services import BACKFILL_SIZE, rebuild
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild home timeline inboxes from FriendShip and Tweet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="*")
+        parser.add_argument("--limit", type=int, default=BACKFILL_SIZE)
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by("pk")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+        count = 0
+        for user_id in users.values_list("pk", flat=True).iterator():
+            rebuild(user_id, options["limit"])
+            count += 1
+        self.stdout.write(f"rebuilt {count} timelines")
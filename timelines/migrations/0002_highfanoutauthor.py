@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('timelines', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HighFanoutAuthor',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
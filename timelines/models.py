@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from tweets.models import Tweet
+
+User = get_user_model()
+
+
+class TimelineEntry(models.Model):
+    owner = models.ForeignKey(
+        User, related_name="timeline_entries", on_delete=models.CASCADE
+    )
+    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE)
+    author = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    # copied from the tweet so a page is a single range scan on this table
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "tweet"], name="timeline_unique"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["owner", "created_at", "tweet"],
+                name="timeline_owner_created_idx",
+            ),
+            models.Index(fields=["owner", "author"], name="timeline_owner_author_idx"),
+        ]
+
+
+class HighFanoutAuthor(models.Model):
+    # Authors at or above TIMELINE_FANOUT_THRESHOLD are merged into timelines
+    # at read time. The flag is sticky: tweets posted while it was set were
+    # never fanned out, so clearing it would drop them from inboxes.
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE)
@@ -0,0 +1,183 @@
+import heapq
+from operator import attrgetter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from accounts.models import FriendShip
+from tweets.models import Tweet
+from tweets.pagination import PAGE_SIZE, encode_cursor, seek
+
+from .models import HighFanoutAuthor, TimelineEntry
+
+User = get_user_model()
+
+BACKFILL_SIZE = 200
+BATCH_SIZE = 1000
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def is_high_fanout(author_id):
+    flagged, followers_count = (
+        User.objects.filter(pk=author_id)
+        .values_list("highfanoutauthor", "profile__followers_count")
+        .get()
+    )
+    if flagged:
+        return True
+    if (followers_count or 0) < settings.TIMELINE_FANOUT_THRESHOLD:
+        return False
+    HighFanoutAuthor.objects.get_or_create(user_id=author_id)
+    return True
+
+
+def high_fanout_followings(owner_id):
+    return FriendShip.objects.filter(
+        following_id=owner_id, followed__highfanoutauthor__isnull=False
+    ).values_list("followed_id", flat=True)
+
+
+def _entry(owner_id, tweet):
+    return TimelineEntry(
+        owner_id=owner_id,
+        tweet=tweet,
+        author_id=tweet.user_id,
+        created_at=tweet.created_at,
+    )
+
+
+def fan_out_to_author(tweet):
+    _insert([_entry(tweet.user_id, tweet)])
+
+
+def fan_out(tweet):
+    entries = [_entry(tweet.user_id, tweet)]
+    if not is_high_fanout(tweet.user_id):
+        follower_ids = (
+            FriendShip.objects.filter(followed_id=tweet.user_id)
+            .values_list("following_id", flat=True)
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        for owner_id in follower_ids:
+            entries.append(_entry(owner_id, tweet))
+            if len(entries) >= BATCH_SIZE:
+                _insert(entries)
+                entries = []
+    _insert(entries)
+
+
+def backfill(owner_id, author_id, limit=BACKFILL_SIZE):
+    tweets = (
+        Tweet.objects.filter(user_id=author_id)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[:limit]
+    )
+    _insert(
+        [
+            TimelineEntry(
+                owner_id=owner_id,
+                tweet_id=tweet_id,
+                author_id=author_id,
+                created_at=created_at,
+            )
+            for tweet_id, created_at in tweets
+        ]
+    )
+
+
+def remove_author(owner_id, author_id):
+    TimelineEntry.objects.filter(owner_id=owner_id, author_id=author_id).delete()
+
+
+@transaction.atomic
+def rebuild(owner_id, limit=BACKFILL_SIZE):
+    TimelineEntry.objects.filter(owner_id=owner_id).delete()
+    backfill(owner_id, owner_id, limit)
+    followed_ids = FriendShip.objects.filter(following_id=owner_id).values_list(
+        "followed_id", flat=True
+    )
+    for author_id in followed_ids:
+        backfill(owner_id, author_id, limit)
+
+
+def _inbox(user, cursor, page_size):
+    return seek(
+        TimelineEntry.objects.filter(owner_id=user.pk).select_related("tweet__user"),
+        cursor,
+        keys=("created_at", "tweet_id"),
+    )[: page_size + 1]
+
+
+def _author_stream(author_id, cursor, page_size):
+    return seek(Tweet.objects.filter(user_id=author_id).select_related("user"), cursor)[
+        : page_size + 1
+    ]
+
+
+def _merge(streams, page_size, key=attrgetter("created_at", "id")):
+    rows = []
+    for row in heapq.merge(*streams, key=key, reverse=True):
+        # tweets fanned out before their author crossed the threshold are
+        # both in the inbox and in the author's stream
+        if rows and key(rows[-1]) == key(row):
+            continue
+        rows.append(row)
+        if len(rows) > page_size:
+            break
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(*key(rows[-1]))
+    return rows, next_cursor
+
+
+def home_timeline(user, cursor=None, page_size=PAGE_SIZE):
+    streams = [(entry.tweet for entry in _inbox(user, cursor, page_size))]
+    for author_id in high_fanout_followings(user.pk):
+        streams.append(_author_stream(author_id, cursor, page_size))
+    return _merge(streams, page_size)
+
+
+async def ahome_timeline(user, cursor=None, page_size=PAGE_SIZE):
+    streams = [[entry.tweet async for entry in _inbox(user, cursor, page_size)]]
+    async for author_id in high_fanout_followings(user.pk):
+        streams.append(
+            [tweet async for tweet in _author_stream(author_id, cursor, page_size)]
+        )
+    return _merge(streams, page_size)
+
+
+# Same page as home_timeline, as tuples in ROW_FIELDS order for the API.
+ROW_FIELDS = ("id", "created_at", "username", "content", "like_count")
+
+
+def home_timeline_rows(user, cursor=None, page_size=PAGE_SIZE):
+    streams = [
+        seek(
+            TimelineEntry.objects.filter(owner_id=user.pk),
+            cursor,
+            keys=("created_at", "tweet_id"),
+        ).values_list(
+            "tweet_id",
+            "created_at",
+            "tweet__user__username",
+            "tweet__content",
+            "tweet__like_count",
+        )[
+            : page_size + 1
+        ]
+    ]
+    for author_id in high_fanout_followings(user.pk):
+        streams.append(
+            seek(Tweet.objects.filter(user_id=author_id), cursor).values_list(
+                "id", "created_at", "user__username", "content", "like_count"
+            )[: page_size + 1]
+        )
+    return _merge(streams, page_size, key=lambda row: (row[1], row[0]))
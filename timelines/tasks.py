@@ -0,0 +1,29 @@
+from accounts.models import FriendShip
+from tasks.queue import task
+from tweets.models import Tweet
+
+from . import services
+
+# Tasks may run late, twice or out of order, so each one checks the current
+# state instead of trusting the event that queued it.
+
+
+@task()
+def fan_out(tweet_id):
+    tweet = Tweet.objects.filter(pk=tweet_id).first()
+    if tweet is not None:
+        services.fan_out(tweet)
+
+
+@task()
+def backfill(owner_id, author_id):
+    if FriendShip.objects.filter(following_id=owner_id, followed_id=author_id).exists():
+        services.backfill(owner_id, author_id)
+
+
+@task()
+def remove_author(owner_id, author_id):
+    if not FriendShip.objects.filter(
+        following_id=owner_id, followed_id=author_id
+    ).exists():
+        services.remove_author(owner_id, author_id)
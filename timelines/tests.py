@@ -0,0 +1,145 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import FriendShip
+from accounts.services import follow
+from tasks.worker import run_pending
+from tweets.models import Tweet
+
+from .models import HighFanoutAuthor, TimelineEntry
+from .services import backfill, fan_out, home_timeline, remove_author
+
+User = get_user_model()
+
+
+class TestFanOut(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.user2 = User.objects.create_user(
+            username="test2", email="test2@test.com", password="goodpass"
+        )
+        self.user3 = User.objects.create_user(
+            username="test3", email="test3@test.com", password="goodpass"
+        )
+        FriendShip.objects.create(following=self.user2, followed=self.user)
+
+    def test_fan_out_to_author_and_followers(self):
+        tweet = Tweet.objects.create(user=self.user, content="hello")
+        fan_out(tweet)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list("owner", flat=True)),
+            {self.user.pk, self.user2.pk},
+        )
+        self.assertEqual(home_timeline(self.user3)[0], [])
+
+    def test_fan_out_is_idempotent(self):
+        tweet = Tweet.objects.create(user=self.user, content="hello")
+        fan_out(tweet)
+        fan_out(tweet)
+        self.assertEqual(TimelineEntry.objects.count(), 2)
+
+    def test_tweet_delete_removes_entries(self):
+        tweet = Tweet.objects.create(user=self.user, content="hello")
+        fan_out(tweet)
+        tweet.delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_backfill_and_remove_author(self):
+        tweet = Tweet.objects.create(user=self.user, content="hello")
+        backfill(self.user3.pk, self.user.pk)
+        self.assertEqual(home_timeline(self.user3)[0], [tweet])
+        remove_author(self.user3.pk, self.user.pk)
+        self.assertEqual(home_timeline(self.user3)[0], [])
+
+    def test_rebuild_timelines_command(self):
+        tweet = Tweet.objects.create(user=self.user, content="hello")
+        call_command("rebuild_timelines", stdout=StringIO())
+        self.assertEqual(home_timeline(self.user2)[0], [tweet])
+        self.assertEqual(home_timeline(self.user)[0], [tweet])
+
+
+class TestHomeTimeline(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.user2 = User.objects.create_user(
+            username="test2", email="test2@test.com", password="goodpass"
+        )
+        self.user3 = User.objects.create_user(
+            username="test3", email="test3@test.com", password="goodpass"
+        )
+        FriendShip.objects.create(following=self.user, followed=self.user2)
+
+    def test_only_followed_tweets(self):
+        self.client.login(username="test2", password="goodpass")
+        self.client.post(reverse("tweets:create"), {"content": "followed"})
+        self.client.login(username="test3", password="goodpass")
+        self.client.post(reverse("tweets:create"), {"content": "not followed"})
+        run_pending()
+        self.client.login(username="test", password="goodpass")
+        response = self.client.get(reverse("accounts:home"))
+        self.assertEqual(
+            [tweet.content for tweet in response.context["tweets"]], ["followed"]
+        )
+
+
+@override_settings(TIMELINE_FANOUT_THRESHOLD=2)
+class TestHybridFanOut(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", email="author@test.com", password="goodpass"
+        )
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.user2 = User.objects.create_user(
+            username="test2", email="test2@test.com", password="goodpass"
+        )
+        follow(self.user, self.author)
+
+    def test_below_threshold_fans_out_on_write(self):
+        fan_out(Tweet.objects.create(user=self.author, content="hello"))
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.user).exists())
+        self.assertFalse(HighFanoutAuthor.objects.exists())
+
+    def test_above_threshold_merges_on_read(self):
+        follow(self.user2, self.author)
+        tweet = Tweet.objects.create(user=self.author, content="hello")
+        fan_out(tweet)
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user).exists())
+        self.assertTrue(HighFanoutAuthor.objects.filter(user=self.author).exists())
+        self.assertEqual(home_timeline(self.user)[0], [tweet])
+
+    def test_merge_orders_and_dedupes_streams(self):
+        before = Tweet.objects.create(user=self.author, content="before")
+        fan_out(before)
+        own = Tweet.objects.create(user=self.user, content="own")
+        fan_out(own)
+        follow(self.user2, self.author)
+        after = Tweet.objects.create(user=self.author, content="after")
+        fan_out(after)
+        self.assertEqual(home_timeline(self.user)[0], [after, own, before])
+
+    def test_merge_paginates_across_streams(self):
+        follow(self.user2, self.author)
+        for i in range(3):
+            fan_out(Tweet.objects.create(user=self.author, content=f"author{i}"))
+            fan_out(Tweet.objects.create(user=self.user, content=f"own{i}"))
+        first, cursor = home_timeline(self.user, page_size=4)
+        second, next_cursor = home_timeline(self.user, cursor, page_size=4)
+        self.assertIsNone(next_cursor)
+        self.assertEqual(
+            [tweet.pk for tweet in first + second],
+            list(
+                Tweet.objects.order_by("-created_at", "-id").values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
@@ -0,0 +1,134 @@
+import gzip
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.db import connection, models
+
+from accounts.models import FriendShip, Profile
+from database.bulk import insert_rows
+from tweets.models import Like, Tweet
+
+User = get_user_model()
+
+FORMAT_VERSION = 1
+BATCH_SIZE = 5000
+COMPRESSLEVEL = 6
+
+# Loaded in this order so foreign keys always point at rows already there.
+# Notifications are not dumped, so neither is their unread counter.
+TABLES = {
+    "users": (User, ()),
+    "profiles": (Profile, ("unread_notifications",)),
+    "follows": (FriendShip, ()),
+    "tweets": (Tweet, ()),
+    "likes": (Like, ()),
+}
+
+
+def path(directory, name):
+    return directory / f"{name}.ndjson.gz"
+
+
+def columns(model, exclude=()):
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.name not in exclude
+    ]
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def export_table(directory, name, batch_size=BATCH_SIZE):
+    # A header line naming the columns, then one JSON array per row.
+    model, exclude = TABLES[name]
+    names = columns(model, exclude)
+    rows = model.objects.order_by("pk").values_list(*names)
+    count = 0
+    with gzip.open(path(directory, name), "wt", COMPRESSLEVEL) as out:
+        out.write(json.dumps({"version": FORMAT_VERSION, "columns": names}) + "\n")
+        rows = rows.iterator(chunk_size=batch_size)
+        while batch := list(islice(rows, batch_size)):
+            out.write(
+                "".join(
+                    json.dumps(row, default=_default, ensure_ascii=False) + "\n"
+                    for row in batch
+                )
+            )
+            count += len(batch)
+    return count
+
+
+def _row(datetimes, line):
+    row = json.loads(line)
+    for i in datetimes:
+        row[i] = row[i] and datetime.fromisoformat(row[i])
+    return row
+
+
+def import_table(directory, name, batch_size=BATCH_SIZE):
+    # Rows go straight from the file to insert_rows; post_save is never sent.
+    model, exclude = TABLES[name]
+    with gzip.open(path(directory, name), "rt") as lines:
+        header = json.loads(next(lines))
+        if header.get("version") != FORMAT_VERSION:
+            raise CommandError(f"{name}: unsupported dump version")
+        names = header["columns"]
+        unknown = set(names) - set(columns(model))
+        if unknown:
+            raise CommandError(f"{name}: unknown columns {sorted(unknown)}")
+        # columns the dump leaves out get the field default, which Django
+        # applies in Python rather than in the schema
+        missing = [
+            field
+            for field in model._meta.concrete_fields
+            if field.attname not in names and not field.primary_key
+        ]
+        defaults = [field.get_default() for field in missing]
+        datetimes = [
+            i
+            for i, name in enumerate(names)
+            if isinstance(model._meta.get_field(name), models.DateTimeField)
+        ]
+        return insert_rows(
+            model,
+            [*names, *(field.attname for field in missing)],
+            (_row(datetimes, line) + defaults for line in lines),
+            batch_size,
+        )
+
+
+def _execute_index_sql(models, sql):
+    # plain DDL through a cursor: the SQLite schema editor refuses to run
+    # inside the import's transaction
+    editor = connection.schema_editor()
+    with connection.cursor() as cursor:
+        for model in models:
+            for index in model._meta.indexes:
+                cursor.execute(str(getattr(index, sql)(model, editor)))
+
+
+@contextmanager
+def deferred_indexes(models):
+    # Secondary indexes are dropped for the load and built once at the end,
+    # which is much cheaper than maintaining them row by row. Unique
+    # constraints stay: the load relies on them to reject duplicates.
+    _execute_index_sql(models, "remove_sql")
+    yield
+    _execute_index_sql(models, "create_sql")
+
+
+def reset_sequences(models):
+    # rows keep their exported ids, so the next insert must start past them
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
@@ -0,0 +1,28 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from database.transactions import deferred_atomic
+from transfer.dump import BATCH_SIZE, TABLES, export_table
+
+
+class Command(BaseCommand):
+    help = "Export users, profiles, follows, tweets and likes as gzipped NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"])
+        directory.mkdir(parents=True, exist_ok=True)
+        # one transaction, so every table comes from the same snapshot; a
+        # deferred BEGIN keeps writers running while it is read
+        with deferred_atomic():
+            for name in TABLES:
+                start = time.perf_counter()
+                count = export_table(directory, name, options["batch_size"])
+                self.stdout.write(
+                    f"exported {count} {name} in {time.perf_counter() - start:.1f}s"
+                )
@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.autocomplete import username_index
+from transfer.dump import (
+    BATCH_SIZE,
+    TABLES,
+    deferred_indexes,
+    import_table,
+    path,
+    reset_sequences,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a dump written by export_data into empty tables with bulk inserts, "
+        "then rebuild what post_save handlers would have maintained."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--skip-rebuild",
+            action="store_true",
+            help=(
+                "Leave the search index, home timelines and recommendations "
+                "for a later run."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"])
+        for name in TABLES:
+            if not path(directory, name).exists():
+                raise CommandError(f"{path(directory, name)} does not exist")
+        models = [model for model, _ in TABLES.values()]
+        for model in models:
+            if model.objects.exists():
+                raise CommandError(f"{model._meta.db_table} is not empty")
+
+        # rows go in through executemany, which sends no post_save, so
+        # profiles come from the dump and nothing is indexed, fanned out or
+        # counted row by row
+        with transaction.atomic(), deferred_indexes(models):
+            for name in TABLES:
+                start = time.perf_counter()
+                count = import_table(directory, name, options["batch_size"])
+                seconds = time.perf_counter() - start
+                self.stdout.write(
+                    f"imported {count} {name} in {seconds:.1f}s "
+                    f"({count / max(seconds, 1e-6):.0f} rows/s)"
+                )
+            reset_sequences(models)
+
+        username_index.load()
+        if not options["skip_rebuild"]:
+            call_command("rebuild_search_index", stdout=self.stdout)
+            call_command("rebuild_timelines", stdout=self.stdout)
+            call_command("build_recommendations", stdout=self.stdout)
@@ -0,0 +1,87 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from accounts.autocomplete import username_index
+from accounts.models import FriendShip, Profile
+from benchmarks.seed import seed_graph
+from recommendations.models import Recommendation
+from search.backends import get_backend
+from timelines.models import TimelineEntry
+from tweets.models import Like, Tweet
+
+from .dump import TABLES, columns
+
+User = get_user_model()
+
+
+class TestExportImport(TestCase):
+    def setUp(self):
+        seed_graph(users=30, follows=5, tweets=100, likes=200)
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def snapshot(self):
+        return {
+            name: list(
+                model.objects.order_by("pk").values_list(*columns(model, exclude))
+            )
+            for name, (model, exclude) in TABLES.items()
+        }
+
+    def test_round_trip(self):
+        Profile.objects.filter(user__username="user0").update(unread_notifications=3)
+        before = self.snapshot()
+        call_command("export_data", self.directory, stdout=StringIO())
+        with gzip.open(self.directory / "tweets.ndjson.gz", "rt") as lines:
+            header = json.loads(next(lines))
+            self.assertEqual(
+                header["columns"],
+                ["id", "user_id", "content", "created_at", "like_count"],
+            )
+            self.assertEqual(len(json.loads(next(lines))), 5)
+
+        User.objects.all().delete()
+        out = StringIO()
+        call_command("import_data", self.directory, batch_size=7, stdout=out)
+        self.assertIn("imported 100 tweets", out.getvalue())
+
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(
+            Profile.objects.get(user__username="user0").unread_notifications, 0
+        )
+
+        # derived data is rebuilt and new rows get fresh ids
+        self.assertTrue(get_backend().search("tweet")[0])
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertTrue(Recommendation.objects.exists())
+        self.assertEqual(username_index.search("user29")[0][0], "user29")
+        tweet = Tweet.objects.create(user=User.objects.first(), content="new")
+        self.assertGreater(tweet.pk, max(row[0] for row in before["tweets"]))
+        self.assertIn(
+            "tweet_user_created_id_idx",
+            Tweet.objects.filter(user=tweet.user).order_by("-created_at").explain(),
+        )
+
+    def test_refuses_non_empty_tables(self):
+        likes = Like.objects.count()
+        call_command("export_data", self.directory, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "is not empty"):
+            call_command("import_data", self.directory, stdout=StringIO())
+        self.assertEqual(Like.objects.count(), likes)
+
+    def test_rejects_unknown_columns(self):
+        call_command("export_data", self.directory, stdout=StringIO())
+        with gzip.open(self.directory / "follows.ndjson.gz", "wt") as out:
+            out.write(json.dumps({"version": 1, "columns": ["id", "friend_id"]}) + "\n")
+        User.objects.all().delete()
+        with self.assertRaisesMessage(CommandError, "unknown columns ['friend_id']"):
+            call_command("import_data", self.directory, stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(FriendShip.objects.exists())
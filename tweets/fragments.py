@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+# Bump when tweets/tweet_row.html changes so stale markup is never served.
+FRAGMENT_VERSION = 1
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Per-viewer parts of a row are left as slots in the shared fragment and
+# filled in by the tweet_row template tag.
+AUTHOR_SLOT = mark_safe("<!--author-->")
+LIKE_SLOT = mark_safe("<!--like-->")
+
+stats = {"hits": 0, "misses": 0}
+
+
+def cache_key(tweet):
+    # like_count is part of the key, so a like or unlike moves the row to a
+    # fresh key and the old one simply expires.
+    return f"tweet-row:v{FRAGMENT_VERSION}:{tweet.pk}:{tweet.like_count}"
+
+
+def attach_rows(tweets):
+    keys = {cache_key(tweet): tweet for tweet in tweets}
+    cached = cache.get_many(keys)
+    stats["hits"] += len(cached)
+    stats["misses"] += len(keys) - len(cached)
+
+    missing = {}
+    for key, tweet in keys.items():
+        if key not in cached:
+            missing[key] = render_to_string(
+                "tweets/tweet_row.html",
+                {"tweet": tweet, "author_slot": AUTHOR_SLOT, "like_slot": LIKE_SLOT},
+            )
+    if missing:
+        cache.set_many(missing, FRAGMENT_TIMEOUT)
+
+    for key, tweet in keys.items():
+        tweet.row_html = cached.get(key) or missing[key]
+    return tweets
+
+
+def invalidate(tweet):
+    cache.delete(cache_key(tweet))
+
+
+def overlay(row_html, author_html, like_html):
+    return mark_safe(
+        row_html.replace(AUTHOR_SLOT, author_html, 1).replace(LIKE_SLOT, like_html, 1)
+    )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from tweets.models import Like, Tweet
+
+
+class Command(BaseCommand):
+    help = "Fix Tweet.like_count drift against the Like table, in pk batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = Tweet.objects.aggregate(Max("pk"))["pk__max"] or 0
+        fixed = 0
+        for start in range(0, last_pk + 1, batch_size):
+            fixed += self.reconcile(start, start + batch_size)
+        self.stdout.write(f"fixed {fixed} tweets")
+
+    @transaction.atomic
+    def reconcile(self, start, end):
+        # lock the tweets first so a like landing mid-batch waits for us
+        tweets = list(
+            Tweet.objects.select_for_update()
+            .filter(pk__gte=start, pk__lt=end)
+            .only("pk", "like_count")
+        )
+        counts = dict(
+            Like.objects.filter(tweet_id__gte=start, tweet_id__lt=end)
+            .values_list("tweet")
+            .annotate(Count("id"))
+            .order_by()
+        )
+        drifted = []
+        for tweet in tweets:
+            count = counts.get(tweet.pk, 0)
+            if tweet.like_count != count:
+                tweet.like_count = count
+                drifted.append(tweet)
+        Tweet.objects.bulk_update(drifted, ["like_count"])
+        return len(drifted)
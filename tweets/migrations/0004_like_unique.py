@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:09
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def dedupe_likes(apps, schema_editor):
+    Tweet = apps.get_model("tweets", "Tweet")
+    Like = apps.get_model("tweets", "Like")
+    duplicates = (
+        Like.objects.values("tweet", "user")
+        .annotate(count=Count("id"), keep=Min("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    tweet_ids = set()
+    for row in duplicates.iterator():
+        Like.objects.filter(tweet=row["tweet"], user=row["user"]).exclude(
+            id=row["keep"]
+        ).delete()
+        tweet_ids.add(row["tweet"])
+    counts = (
+        Like.objects.filter(tweet=OuterRef("pk"))
+        .values("tweet")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Tweet.objects.filter(pk__in=tweet_ids).update(
+        like_count=Coalesce(Subquery(counts), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tweets", "0003_tweet_like_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="like",
+            constraint=models.UniqueConstraint(
+                fields=("tweet", "user"), name="like_unique"
+            ),
+        ),
+    ]
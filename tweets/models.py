@@ -1,16 +1,45 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
+from .fragments import invalidate
+
 User = get_user_model()
 
 
 class Tweet(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # indexed by tweet_user_created_id_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     content = models.TextField(max_length=140)
     created_at = models.DateTimeField(auto_now_add=True)
+    like_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="tweet_created_id_idx"),
+            models.Index(
+                fields=["user", "created_at", "id"], name="tweet_user_created_id_idx"
+            ),
+        ]
 
 
 class Like(models.Model):
-    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # indexed by like_unique and like_user_tweet_idx
+    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tweet", "user"], name="like_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "tweet"], name="like_user_tweet_idx"),
+        ]
+
+
+@receiver(post_save, sender=Tweet)
+@receiver(post_delete, sender=Tweet)
+def invalidate_tweet_row(sender, instance, **kwargs):
+    invalidate(instance)
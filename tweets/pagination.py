@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.exceptions import BadRequest
+
+PAGE_SIZE = 20
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(created_at, pk):
+    micros = (created_at - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = cursor.split("_")
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError):
+        raise BadRequest("invalid cursor")
+
+
+def seek(queryset, cursor=None, keys=("created_at", "id")):
+    # `created_at <= cursor` is a range seek on the composite index and the
+    # exclude only trims rows sharing the cursor's timestamp, so every page
+    # costs the same no matter how far back the reader has scrolled.
+    time_key, id_key = keys
+    queryset = queryset.order_by(f"-{time_key}", f"-{id_key}")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(**{f"{time_key}__lte": created_at}).exclude(
+            **{time_key: created_at, f"{id_key}__gte": pk}
+        )
+    return queryset
+
+
+def paginate(queryset, cursor=None, page_size=PAGE_SIZE, keys=("created_at", "id")):
+    rows = list(seek(queryset, cursor, keys)[: page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(*(getattr(last, key) for key in keys))
+    return rows, next_cursor
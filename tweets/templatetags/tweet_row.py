@@ -0,0 +1,14 @@
+from django import template
+from django.template.loader import get_template
+
+from tweets.fragments import overlay
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def tweet_row(context, tweet, author_template):
+    with context.push(tweet=tweet):
+        author_html = get_template(author_template).template.render(context)
+        like_html = get_template("tweets/like_button.html").template.render(context)
+    return overlay(tweet.row_html, author_html, like_html)
@@ -1,6 +1,15 @@
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from tasks.worker import run_pending
+from tweets import fragments
 from tweets.models import Tweet, Like
 
 User = get_user_model()
@@ -114,17 +123,59 @@ class TestFavoriteView(TestCase):
         response = self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
         self.assertEqual(response.status_code, 200)
         self.assertTrue(Like.objects.filter(tweet=self.tweet).exists())
+        self.assertEqual(response.json()["count"], 1)
+        self.tweet.refresh_from_db()
+        self.assertEqual(self.tweet.like_count, 1)
 
     def test_failure_post_with_not_exist_tweet(self):
         response = self.client.post(reverse("tweets:like", kwargs={"pk": 100}))
         self.assertEqual(response.status_code, 404)
         self.assertFalse(Like.objects.filter(tweet=self.tweet).exists())
 
+    def test_success_post_with_existing_like_row(self):
+        Like.objects.create(tweet=self.tweet, user=self.user)
+        response = self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Like.objects.filter(tweet=self.tweet).count(), 1)
+
+    def test_failure_get(self):
+        response = self.client.get(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        self.assertEqual(response.status_code, 405)
+
+    def test_failure_post_without_login(self):
+        self.client.logout()
+        url = reverse("tweets:like", kwargs={"pk": self.tweet.pk})
+        response = self.client.post(url)
+        self.assertRedirects(response, f"{reverse('accounts:signin')}?next={url}")
+        self.assertFalse(Like.objects.exists())
+
+    async def test_success_post_async(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.post(
+            reverse("tweets:like", kwargs={"pk": self.tweet.pk})
+        )
+        self.assertEqual(response.json(), {"tweet_id": self.tweet.pk, "liked": True, "count": 1})
+        self.assertEqual(await Like.objects.filter(tweet_id=self.tweet.pk).acount(), 1)
+
+    def test_failure_rolls_back_like_with_counter(self):
+        with mock.patch("tweets.views._like_count_or_404", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        self.assertFalse(Like.objects.exists())
+        self.tweet.refresh_from_db()
+        self.assertEqual(self.tweet.like_count, 0)
+
+    def test_failure_create_duplicated_like(self):
+        Like.objects.create(tweet=self.tweet, user=self.user)
+        with self.assertRaises(IntegrityError):
+            Like.objects.create(tweet=self.tweet, user=self.user)
+
     def test_failure_post_with_favorited_tweet(self):
         self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
         response = self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(Like.objects.filter(tweet=self.tweet).count(), 1)
+        self.assertEqual(response.json()["count"], 1)
 
 
 class TestUnfavoriteView(TestCase):
@@ -142,6 +193,9 @@ class TestUnfavoriteView(TestCase):
         response = self.client.post(reverse("tweets:unlike", kwargs={"pk": self.tweet.pk}))
         self.assertEqual(response.status_code, 200)
         self.assertFalse(Like.objects.filter(tweet=self.tweet).exists())
+        self.assertEqual(response.json()["count"], 0)
+        self.tweet.refresh_from_db()
+        self.assertEqual(self.tweet.like_count, 0)
 
     def test_failure_post_with_not_exist_tweet(self):
         response = self.client.post(reverse("tweets:unlike", kwargs={"pk": 100}))
@@ -152,3 +206,90 @@ class TestUnfavoriteView(TestCase):
         self.client.post(reverse("tweets:unlike", kwargs={"pk": self.tweet.pk}))
         response = self.client.post(reverse("tweets:unlike", kwargs={"pk": self.tweet.pk}))
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 0)
+
+
+class TestReconcileLikeCounts(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.tweet = Tweet.objects.create(user=self.user, content="hello")
+        self.tweet2 = Tweet.objects.create(user=self.user, content="sorry")
+        Like.objects.create(tweet=self.tweet, user=self.user)
+
+    def test_success_reconcile(self):
+        Tweet.objects.filter(pk=self.tweet2.pk).update(like_count=5)
+        out = StringIO()
+        call_command("reconcile_like_counts", batch_size=1, stdout=out)
+        self.assertEqual(
+            dict(Tweet.objects.values_list("pk", "like_count")),
+            {self.tweet.pk: 1, self.tweet2.pk: 0},
+        )
+        self.assertIn("fixed 2 tweets", out.getvalue())
+
+
+class TestTweetRowCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        fragments.stats.update(hits=0, misses=0)
+        self.user = User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.user2 = User.objects.create_user(
+            username="test2", email="test2@test.com", password="goodpass"
+        )
+        self.client.login(username="test", password="goodpass")
+        self.client.post(reverse("tweets:create"), {"content": "hello"})
+        self.tweet = Tweet.objects.get(content="hello")
+
+    def test_success_hit_after_first_render(self):
+        self.client.get(reverse("accounts:home"))
+        self.client.get(reverse("accounts:home"))
+        self.assertEqual(fragments.stats, {"hits": 1, "misses": 1})
+
+    def test_success_like_moves_to_new_key(self):
+        response = self.client.get(reverse("accounts:home"))
+        self.assertContains(response, "<p name=\"%d-count\" class=\"count\"> 0 </p>" % self.tweet.pk)
+        self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        response = self.client.get(reverse("accounts:home"))
+        self.assertContains(response, "<p name=\"%d-count\" class=\"count\"> 1 </p>" % self.tweet.pk)
+        self.assertEqual(fragments.stats["misses"], 2)
+
+    def test_success_delete_invalidates(self):
+        fragments.attach_rows([self.tweet])
+        self.assertIsNotNone(cache.get(fragments.cache_key(self.tweet)))
+        self.tweet.delete()
+        self.assertIsNone(cache.get(fragments.cache_key(self.tweet)))
+
+    def test_success_overlay_per_viewer(self):
+        self.client.post(reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        response = self.client.get(reverse("accounts:home"))
+        unlike_url = reverse("tweets:unlike", kwargs={"pk": self.tweet.pk})
+        self.assertContains(response, unlike_url)
+        self.client.login(username="test2", password="goodpass")
+        self.client.post(reverse("accounts:follow", kwargs={"username": "test"}))
+        run_pending()
+        response = self.client.get(reverse("accounts:home"))
+        self.assertEqual(fragments.stats["hits"], 1)
+        self.assertNotContains(response, unlike_url)
+        self.assertContains(response, reverse("tweets:like", kwargs={"pk": self.tweet.pk}))
+        self.assertNotContains(response, "<!--like-->")
+
+
+class TestCacheStatsView(TestCase):
+    def test_failure_get_with_non_staff(self):
+        User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass"
+        )
+        self.client.login(username="test", password="goodpass")
+        response = self.client.get(reverse("tweets:cache_stats"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_success_get_with_staff(self):
+        User.objects.create_user(
+            username="test", email="test@test.com", password="goodpass", is_staff=True
+        )
+        self.client.login(username="test", password="goodpass")
+        response = self.client.get(reverse("tweets:cache_stats"))
+        self.assertEqual(set(response.json()), {"hits", "misses"})
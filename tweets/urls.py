@@ -9,4 +9,5 @@ urlpatterns = [
     path("<int:pk>/delete/", views.TweetDeleteView.as_view(), name="delete"),
     path('<int:pk>/like/', views.like_view, name='like'),
     path('<int:pk>/unlike/', views.unlike_view, name='unlike'),
+    path('cache/stats/', views.cache_stats_view, name='cache_stats'),
 ]
@@ -1,14 +1,21 @@
+from asgiref.sync import sync_to_async
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DetailView, DeleteView
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import IntegrityError, transaction
+from django.db.models import F
 
-from django.shortcuts import get_object_or_404
+from django.http import Http404, JsonResponse
 
-from django.http import JsonResponse
+from accounts.decorators import alogin_required, arequire_POST
+from streaming import events as streaming
+from tasks.queue import enqueue
+from timelines import services as timelines
+from timelines import tasks as timeline_tasks
 
+from . import fragments
 from .forms import TweetForm
 from .models import Tweet, Like
 
@@ -22,14 +29,36 @@ class TweetCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        return super().form_valid(form)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            # the author sees the tweet at once, followers once a worker
+            # has run the fan-out
+            timelines.fan_out_to_author(self.object)
+            enqueue(
+                timeline_tasks.fan_out,
+                key=f"fan_out:{self.object.pk}",
+                tweet_id=self.object.pk,
+            )
+            streaming.publish_tweet(self.object)
+        return response
 
 
 class TweetDetailView(DetailView):
     template_name = "tweets/tweet_detail.html"
-    model = Tweet
+    queryset = Tweet.objects.select_related("user")
     context_object_name = "tweet"
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["liked_ids"] = set()
+        if self.request.user.is_authenticated:
+            ctx["liked_ids"] = set(
+                Like.objects.filter(
+                    user=self.request.user, tweet=self.object
+                ).values_list("tweet_id", flat=True)
+            )
+        return ctx
+
 
 class TweetDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     template_name = "tweets/tweet_delete.html"
@@ -41,36 +70,71 @@ class TweetDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == tweet.user
 
 
-@login_required
-@require_POST
-def like_view(request, pk):
-    tweet = get_object_or_404(Tweet, pk=pk)
-    Like.objects.get_or_create(tweet=tweet, user=request.user)
+def _like_count_or_404(pk):
+    count = Tweet.objects.filter(pk=pk).values_list("like_count", flat=True).first()
+    if count is None:
+        raise Http404
+    return count
+
+
+@transaction.atomic
+def _like(pk, user):
+    # Insert first and let like_unique reject a second like, instead of
+    # get-then-insert which races under double clicks.
+    try:
+        with transaction.atomic():
+            Like.objects.create(tweet_id=pk, user=user)
+    except IntegrityError:
+        pass
+    else:
+        Tweet.objects.filter(pk=pk).update(like_count=F("like_count") + 1)
+    return _like_count_or_404(pk)
+
+
+@transaction.atomic
+def _unlike(pk, user):
+    deleted, _ = Like.objects.filter(tweet_id=pk, user=user).delete()
+    if deleted:
+        Tweet.objects.filter(pk=pk).update(like_count=F("like_count") - deleted)
+    return _like_count_or_404(pk)
+
+
+# The writes run as one sync transaction in the connection's thread; the
+# async views only await it, so the counter never drifts from the Like rows.
+
+
+@alogin_required
+@arequire_POST
+async def like_view(request, pk):
+    count = await sync_to_async(_like, thread_sensitive=True)(pk, request.user)
+    streaming.publish_like_count(pk, count)
     liked = True
 
     context = {
-        "tweet_id": tweet.id,
+        "tweet_id": pk,
         "liked": liked,
-        "count": tweet.like_set.count(),
+        "count": count,
     }
 
     return JsonResponse(context)
 
 
-@login_required
-@require_POST
-def unlike_view(request, pk):
-    tweet = get_object_or_404(Tweet, pk=pk)
-    if like := Like.objects.filter(tweet=tweet, user=request.user).select_related(
-        "tweet", "user"
-    ):
-        like.delete()
+@alogin_required
+@arequire_POST
+async def unlike_view(request, pk):
+    count = await sync_to_async(_unlike, thread_sensitive=True)(pk, request.user)
+    streaming.publish_like_count(pk, count)
     liked = False
 
     context = {
-        "tweet_id": tweet.id,
+        "tweet_id": pk,
         "liked": liked,
-        "count": tweet.like_set.count(),
+        "count": count,
     }
 
     return JsonResponse(context)
+
+
+@staff_member_required
+def cache_stats_view(request):
+    return JsonResponse(fragments.stats)